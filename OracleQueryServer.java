@@ -1,12 +1,26 @@
 import java.io.*;
+import java.nio.charset.StandardCharsets;
 import java.sql.*;
+import java.util.HashMap;
+import java.util.Map;
+import java.util.Properties;
 import org.json.JSONObject;
 import org.json.JSONArray;
+import org.json.JSONWriter;
 
 /**
  * Long-lived Oracle query server for connection pooling.
  * Accepts queries from stdin and returns JSON results to stdout.
  * Maintains a single database connection for reuse.
+ *
+ * Every message in both directions is framed as a 4-byte big-endian
+ * length followed by that many bytes of UTF-8 payload.
+ *
+ * Besides plain queries, PING and EXIT, the server understands a prepared
+ * statement subprotocol (fields separated by tabs):
+ *   PREPARE<TAB>sql              -> {"success": true, "handle": n}
+ *   EXEC<TAB>handle<TAB>[params] -> same result shape as a plain query
+ *   CLOSE<TAB>handle             -> {"success": true}
  */
 public class OracleQueryServer {
     private Connection conn = null;
@@ -15,6 +29,22 @@ public class OracleQueryServer {
     private String password;
     private boolean isConnected = false;
 
+    // Prepared statements by handle; only valid for the current connection
+    private final Map<Integer, PreparedStatement> prepared = new HashMap<>();
+    private int nextHandle = 1;
+
+    // Driver-side cache of closed statements, keyed by SQL text; repeated
+    // queries reuse the parsed cursor instead of re-parsing on the server
+    private static final String STATEMENT_CACHE_SIZE = "50";
+
+    // Rows fetched per round trip. query_oracle results are capped at
+    // 10000 rows, so a full result takes ~10 fetches instead of ~1000 at
+    // the driver default of 10
+    private static final int FETCH_SIZE = 1000;
+
+    private static final DataOutputStream out =
+        new DataOutputStream(new BufferedOutputStream(System.out, 65536));
+
     public OracleQueryServer(String url, String user, String password) {
         this.url = url;
         this.user = user;
@@ -29,17 +59,53 @@ public class OracleQueryServer {
             return; // Already connected
         }
 
+        // Statements prepared on a previous connection are unusable now;
+        // clients see "unknown_handle" and prepare again
+        for (PreparedStatement stmt : prepared.values()) {
+            try {
+                stmt.close();
+            } catch (SQLException e) {
+                // Owning connection is already gone
+            }
+        }
+        prepared.clear();
+
         Class.forName("oracle.jdbc.driver.OracleDriver");
         DriverManager.setLoginTimeout(5);
-        conn = DriverManager.getConnection(url, user, password);
+        Properties props = new Properties();
+        props.setProperty("user", user);
+        props.setProperty("password", password);
+        props.setProperty("oracle.jdbc.implicitStatementCacheSize", STATEMENT_CACHE_SIZE);
+        props.setProperty("defaultRowPrefetch", Integer.toString(FETCH_SIZE));
+        conn = DriverManager.getConnection(url, props);
         isConnected = true;
+    }
+
+    /**
+     * Write one length-prefixed frame to stdout and flush it.
+     */
+    private static void writeFrame(String payload) throws IOException {
+        byte[] bytes = payload.getBytes(StandardCharsets.UTF_8);
+        out.writeInt(bytes.length);
+        out.write(bytes);
+        out.flush();
+    }
 
-        // Send ready signal
-        JSONObject ready = new JSONObject();
-        ready.put("status", "ready");
-        ready.put("message", "Connection established");
-        System.out.println(ready.toString());
-        System.out.flush();
+    /**
+     * Read one length-prefixed frame from stdin.
+     *
+     * @return the decoded payload, or null once stdin is closed
+     */
+    private static String readFrame(DataInputStream in) throws IOException {
+        int length;
+        try {
+            length = in.readInt();
+        } catch (EOFException e) {
+            return null;
+        }
+        byte[] bytes = new byte[length];
+        in.readFully(bytes);
+        return new String(bytes, StandardCharsets.UTF_8);
     }
 
     /**
@@ -63,59 +129,91 @@ public class OracleQueryServer {
         }
     }
 
+    /**
+     * Convert a result set into the JSON result returned to the client.
+     *
+     * Rows are written straight into the output buffer as they are fetched,
+     * without building a JSONObject per row. Output matches the old
+     * JSONObject.put behaviour: null columns are omitted and, among columns
+     * sharing a name, the last one wins.
+     */
+    private static String resultToJson(ResultSet rs) throws SQLException {
+        // Get metadata
+        ResultSetMetaData rsmd = rs.getMetaData();
+        int columnCount = rsmd.getColumnCount();
+        String[] columnNames = new String[columnCount];
+        for (int i = 1; i <= columnCount; i++) {
+            columnNames[i - 1] = rsmd.getColumnName(i);
+        }
+        // JSONWriter rejects duplicate keys, so skip shadowed columns
+        boolean[] shadowed = new boolean[columnCount];
+        for (int i = 0; i < columnCount; i++) {
+            for (int j = i + 1; j < columnCount; j++) {
+                if (columnNames[i].equals(columnNames[j])) {
+                    shadowed[i] = true;
+                    break;
+                }
+            }
+        }
+
+        // Build JSON result
+        StringBuilder buffer = new StringBuilder();
+        JSONWriter writer = new JSONWriter(buffer);
+        writer.object().key("success").value(true).key("rows").array();
+        int count = 0;
+        while (rs.next()) {
+            writer.object();
+            for (int i = 1; i <= columnCount; i++) {
+                if (shadowed[i - 1]) {
+                    continue;
+                }
+                Object value = rs.getObject(i);
+                if (value != null) {
+                    writer.key(columnNames[i - 1]).value(value);
+                }
+            }
+            writer.endObject();
+            count++;
+        }
+        writer.endArray().key("count").value(count).endObject();
+        return buffer.toString();
+    }
+
+    private static String errorJson(Exception e) {
+        JSONObject error = new JSONObject();
+        error.put("success", false);
+        if (e instanceof SQLException) {
+            error.put("error", "Database error: " + e.getMessage());
+            error.put("sql_state", ((SQLException) e).getSQLState());
+        } else {
+            error.put("error", "Query execution failed: " + e.getMessage());
+        }
+        return error.toString();
+    }
+
     /**
      * Execute a query and return JSON result.
      */
     private String executeQuery(String query) {
-        Statement stmt = null;
+        PreparedStatement stmt = null;
         ResultSet rs = null;
 
         try {
             // Ensure connection is alive
             ensureConnected();
 
-            // Create statement with security settings
-            stmt = conn.createStatement();
+            // Prepared (not plain) so close() returns it to the implicit
+            // statement cache and a repeat of the same SQL skips the parse
+            stmt = conn.prepareStatement(query);
             stmt.setQueryTimeout(5); // 5 second query timeout
-            stmt.setFetchSize(1000); // Prevent memory exhaustion
+            stmt.setFetchSize(FETCH_SIZE); // Bounded batches, few round trips
 
             // Execute query
-            rs = stmt.executeQuery(query);
-
-            // Get metadata
-            ResultSetMetaData rsmd = rs.getMetaData();
-            int columnCount = rsmd.getColumnCount();
-
-            // Build JSON result
-            JSONArray results = new JSONArray();
-            while (rs.next()) {
-                JSONObject row = new JSONObject();
-                for (int i = 1; i <= columnCount; i++) {
-                    String columnName = rsmd.getColumnName(i);
-                    Object value = rs.getObject(i);
-                    row.put(columnName, value);
-                }
-                results.put(row);
-            }
-
-            // Output JSON
-            JSONObject output = new JSONObject();
-            output.put("success", true);
-            output.put("rows", results);
-            output.put("count", results.length());
-            return output.toString();
+            rs = stmt.executeQuery();
+            return resultToJson(rs);
 
-        } catch (SQLException e) {
-            JSONObject error = new JSONObject();
-            error.put("success", false);
-            error.put("error", "Database error: " + e.getMessage());
-            error.put("sql_state", e.getSQLState());
-            return error.toString();
         } catch (Exception e) {
-            JSONObject error = new JSONObject();
-            error.put("success", false);
-            error.put("error", "Query execution failed: " + e.getMessage());
-            return error.toString();
+            return errorJson(e);
         } finally {
             // Close resources but keep connection alive
             try {
@@ -131,6 +229,90 @@ public class OracleQueryServer {
         }
     }
 
+    /**
+     * Prepare a statement once so later EXECs skip the parse/plan step.
+     */
+    private String prepareStatement(String sql) {
+        try {
+            ensureConnected();
+
+            PreparedStatement stmt = conn.prepareStatement(sql);
+            stmt.setQueryTimeout(5); // 5 second query timeout
+            stmt.setFetchSize(FETCH_SIZE); // Bounded batches, few round trips
+
+            int handle = nextHandle++;
+            prepared.put(handle, stmt);
+
+            JSONObject output = new JSONObject();
+            output.put("success", true);
+            output.put("handle", handle);
+            return output.toString();
+        } catch (Exception e) {
+            return errorJson(e);
+        }
+    }
+
+    /**
+     * Execute a previously prepared statement with the given bind values.
+     */
+    private String executePrepared(String handleText, String paramsJson) {
+        ResultSet rs = null;
+
+        try {
+            ensureConnected();
+
+            PreparedStatement stmt = prepared.get(Integer.parseInt(handleText));
+            if (stmt == null) {
+                JSONObject error = new JSONObject();
+                error.put("success", false);
+                error.put("error", "Unknown statement handle: " + handleText);
+                error.put("unknown_handle", true);
+                return error.toString();
+            }
+
+            stmt.clearParameters();
+            JSONArray params = new JSONArray(paramsJson);
+            for (int i = 0; i < params.length(); i++) {
+                Object value = params.get(i);
+                if (value == JSONObject.NULL) {
+                    stmt.setNull(i + 1, Types.VARCHAR);
+                } else {
+                    stmt.setObject(i + 1, value);
+                }
+            }
+
+            rs = stmt.executeQuery();
+            return resultToJson(rs);
+
+        } catch (Exception e) {
+            return errorJson(e);
+        } finally {
+            // Keep the statement open for reuse; only the result set goes
+            try {
+                if (rs != null) rs.close();
+            } catch (SQLException e) {
+                System.err.println("Warning: Failed to close ResultSet: " + e.getMessage());
+            }
+        }
+    }
+
+    /**
+     * Release a prepared statement.
+     */
+    private String closePrepared(String handleText) {
+        JSONObject output = new JSONObject();
+        try {
+            PreparedStatement stmt = prepared.remove(Integer.parseInt(handleText));
+            if (stmt != null) {
+                stmt.close();
+            }
+            output.put("success", true);
+        } catch (Exception e) {
+            return errorJson(e);
+        }
+        return output.toString();
+    }
+
     /**
      * Main server loop - reads queries from stdin, executes, returns results to stdout.
      */
@@ -139,11 +321,17 @@ public class OracleQueryServer {
             // Connect to database
             connect();
 
+            // Send ready signal (once; reconnects later are transparent)
+            JSONObject ready = new JSONObject();
+            ready.put("status", "ready");
+            ready.put("message", "Connection established");
+            writeFrame(ready.toString());
+
             // Read queries from stdin
-            BufferedReader reader = new BufferedReader(new InputStreamReader(System.in));
+            DataInputStream in = new DataInputStream(new BufferedInputStream(System.in, 65536));
             String line;
 
-            while ((line = reader.readLine()) != null) {
+            while ((line = readFrame(in)) != null) {
                 line = line.trim();
 
                 // Handle special commands
@@ -151,8 +339,7 @@ public class OracleQueryServer {
                     JSONObject pong = new JSONObject();
                     pong.put("status", "alive");
                     pong.put("connected", isConnectionAlive());
-                    System.out.println(pong.toString());
-                    System.out.flush();
+                    writeFrame(pong.toString());
                     continue;
                 }
 
@@ -164,17 +351,36 @@ public class OracleQueryServer {
                     continue;
                 }
 
+                // Prepared statement subprotocol
+                if (line.startsWith("PREPARE\t")) {
+                    writeFrame(prepareStatement(line.substring(8)));
+                    continue;
+                }
+
+                if (line.startsWith("EXEC\t")) {
+                    String[] parts = line.split("\t", 3);
+                    writeFrame(executePrepared(parts[1], parts.length > 2 ? parts[2] : "[]"));
+                    continue;
+                }
+
+                if (line.startsWith("CLOSE\t")) {
+                    writeFrame(closePrepared(line.substring(6)));
+                    continue;
+                }
+
                 // Execute query
-                String result = executeQuery(line);
-                System.out.println(result);
-                System.out.flush();
+                writeFrame(executeQuery(line));
             }
 
         } catch (Exception e) {
             JSONObject error = new JSONObject();
             error.put("success", false);
             error.put("error", "Server error: " + e.getMessage());
-            System.out.println(error.toString());
+            try {
+                writeFrame(error.toString());
+            } catch (IOException ignored) {
+                // Client is gone; nothing left to report to
+            }
             System.err.println("Fatal error: " + e.getMessage());
             e.printStackTrace(System.err);
         } finally {
@@ -207,7 +413,11 @@ public class OracleQueryServer {
             JSONObject error = new JSONObject();
             error.put("success", false);
             error.put("error", "ORACLE_USER and ORACLE_PASSWORD environment variables must be set");
-            System.out.println(error.toString());
+            try {
+                writeFrame(error.toString());
+            } catch (IOException ignored) {
+                // Client is gone; nothing left to report to
+            }
             System.exit(1);
         }
 
@@ -2,25 +2,134 @@
 """
 Oracle database connection using JDBC via subprocess.
 Works through StrongDM proxy on Apple Silicon.
-Implements connection pooling with maximum 2 concurrent connections.
+Implements connection pooling with 2 concurrent connections by default.
 """
 
+import asyncio
+import atexit
+import functools
 import json
 import logging
 import os
+import re
+import selectors
+import struct
 import subprocess
 import threading
 import time
-import queue
-from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 from pathlib import Path
 
+# orjson parses worker responses several times faster than the stdlib json
+# module; it is optional and both accept the raw bytes of a frame
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # orjson cannot represent integers beyond 64 bits (depending on the
+    # version it raises or silently returns a float), and Oracle NUMBER
+    # columns can produce them. Any run of 19+ digits sends the payload to
+    # the stdlib parser, which keeps them exact.
+    _LONG_DIGIT_RUN = re.compile(rb"\d{19,}")
+
+    def _json_loads(data: Union[bytes, bytearray]) -> Any:
+        if _LONG_DIGIT_RUN.search(data):
+            return json.loads(data)
+        return orjson.loads(data)
+else:
+    _json_loads = json.loads
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Pools shared by every OracleJDBC instance, keyed by (jdbc_url, user).
+# _POOL_REFS counts the instances holding each pool so that the last
+# shutdown() stops the JVM workers.
+_POOL_CACHE: Dict[Tuple[str, str], "ConnectionPool"] = {}
+_POOL_REFS: Dict[Tuple[str, str], int] = {}
+_POOL_CACHE_LOCK = threading.Lock()
+
+# Every message to and from a worker is a 4-byte big-endian payload length
+# followed by that many bytes of UTF-8
+_FRAME_HEADER = struct.Struct(">I")
+
+
+def _encode_frames(messages: List[str]) -> bytearray:
+    """
+    Encode messages for the worker as consecutive length-prefixed frames.
+
+    Args:
+        messages: Payloads to send (queries or protocol commands)
+
+    Returns:
+        Bytes ready to be written to the worker's stdin
+    """
+    frames = bytearray()
+    for message in messages:
+        payload = message.encode("utf-8")
+        frames += _FRAME_HEADER.pack(len(payload))
+        frames += payload
+    return frames
+
+
+def _worker_argv(java_bin: Path, classpath: str, jdbc_url: str, work_dir: Path) -> List[str]:
+    """
+    Build the command line that launches an OracleQueryServer worker.
+
+    Relative classpath entries are resolved against work_dir, so the
+    worker can be launched without setting a cwd.
+
+    Args:
+        java_bin: Path to Java binary
+        classpath: Java classpath
+        jdbc_url: JDBC connection URL
+        work_dir: Directory that relative classpath entries are resolved against
+
+    Returns:
+        argv list for the worker process
+    """
+    classpath = os.pathsep.join(
+        entry if os.path.isabs(entry) else os.path.normpath(os.path.join(work_dir, entry))
+        for entry in classpath.split(os.pathsep)
+    )
+    return [str(java_bin), "-cp", classpath, "OracleQueryServer", jdbc_url]
+
+
+@dataclass(slots=True)
+class Stats:
+    """Usage counters for one worker connection (monotonic nanoseconds)."""
+
+    started_ns: int = 0
+    last_used_ns: int = 0
+    queries_served: int = 0
+
+    def record(self, queries: int):
+        """Count queries that just completed."""
+        self.last_used_ns = time.monotonic_ns()
+        self.queries_served += queries
+
 
 class Connection:
-    """Represents a single connection to Oracle via long-lived Java subprocess."""
+    """
+    Represents a single connection to Oracle via long-lived Java subprocess.
+
+    A Connection is not thread-safe and has no lock of its own: the pool
+    hands each one to a single caller at a time, and only that caller may
+    use it until it is released.
+    """
+
+    # Max bytes of queries written ahead of their responses in execute_many.
+    # Kept below the smallest common pipe buffer (64 KiB on Linux/macOS).
+    PIPELINE_WINDOW = 32 * 1024
+
+    # Prepared statements kept open on the worker; the least recently used
+    # one is closed once more than this many distinct SQL texts are cached
+    STATEMENT_CACHE_SIZE = 32
 
     def __init__(self, connection_id: int, java_bin: Path, classpath: str, jdbc_url: str, work_dir: Path, env: dict):
         """
@@ -31,20 +140,25 @@ class Connection:
             java_bin: Path to Java binary
             classpath: Java classpath
             jdbc_url: JDBC connection URL
-            work_dir: Working directory for subprocess
+            work_dir: Directory that relative classpath entries are resolved against
             env: Environment variables (including credentials)
         """
         self.connection_id = connection_id
         self.java_bin = java_bin
-        self.classpath = classpath
         self.jdbc_url = jdbc_url
         self.work_dir = work_dir
         self.env = env
+
+        # The launch command never changes, so build it once rather than on
+        # every (re)start. Relative classpath entries are resolved here so
+        # the JVM can be launched without a cwd (see start()).
+        self._argv = _worker_argv(java_bin, classpath, jdbc_url, work_dir)
+        self.classpath = self._argv[2]
         self.process = None
-        self.lock = threading.Lock()
-        self.is_busy = False
-        self.last_used = time.time()
-        self.start_time = None
+        self.selector = None
+        self._rbuf = bytearray()  # Bytes read from stdout but not yet consumed
+        self._statements: "OrderedDict[str, int]" = OrderedDict()  # SQL -> worker handle
+        self.stats = Stats()
 
     def start(self):
         """Start the Java subprocess."""
@@ -53,27 +167,35 @@ class Connection:
             return
 
         logger.info(f"Starting connection {self.connection_id}")
+
+        # No cwd, preexec_fn or pass_fds and close_fds=False keep Popen on its
+        # posix_spawn fast path (Linux), so launching the JVM doesn't fork and
+        # copy this process's page tables. Our own fds are non-inheritable
+        # by default (PEP 446), so nothing leaks into the child.
+        if not getattr(subprocess, "_USE_POSIX_SPAWN", False):
+            logger.debug("posix_spawn unavailable; subprocess will fork/exec")
         self.process = subprocess.Popen(
-            [
-                str(self.java_bin),
-                "-cp", self.classpath,
-                "OracleQueryServer",
-                self.jdbc_url
-            ],
-            cwd=str(self.work_dir),
+            self._argv,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,  # Line buffered
+            bufsize=0,  # Length-prefixed binary frames, no line buffering
+            close_fds=False,
             env=self.env
         )
-        self.start_time = time.time()
+        self.stats.started_ns = time.monotonic_ns()
+
+        # Poll stdout through a selector so reads can honour a timeout.
+        # Responses are read straight from the fd into _rbuf; going through
+        # a buffered reader would hide already-buffered frames from select().
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.process.stdout, selectors.EVENT_READ)
+        self._rbuf.clear()
+        self._statements.clear()  # Handles die with the old worker
 
-        # Wait for ready signal
+        # Wait for ready signal (JVM startup plus database login)
         try:
-            ready_line = self.process.stdout.readline()
-            ready_response = json.loads(ready_line)
+            ready_response = _json_loads(self._read_frame(30.0))
             if ready_response.get('status') == 'ready':
                 logger.info(f"Connection {self.connection_id} ready: {ready_response.get('message')}")
             else:
@@ -94,75 +216,322 @@ class Connection:
         Returns:
             Query result dictionary
         """
-        with self.lock:
-            if self.process is None or self.process.poll() is not None:
-                raise RuntimeError(f"Connection {self.connection_id} is not running")
+        if self.process is None or self.process.poll() is not None:
+            raise RuntimeError(f"Connection {self.connection_id} is not running")
 
-            self.is_busy = True
-            try:
-                # Send query
-                self.process.stdin.write(query + "\n")
-                self.process.stdin.flush()
+        try:
+            # Send query
+            self._send([query])
+
+            # Block until the worker answers or the timeout elapses
+            result = self._read_frame(timeout)
+
+            # Parse response
+            response = _json_loads(result)
+            self.stats.record(1)
+            return response
+
+        except Exception as e:
+            return self._request_failed(e)
 
-                # Read response with timeout
-                start_time = time.time()
-                result_line = None
+    def execute_many(self, queries: List[str], timeout: float = 5.0) -> List[Dict[str, Any]]:
+        """
+        Execute several queries in one pipe round-trip.
+
+        All queries are written to the worker before any response is read,
+        so the Java side can start on the next query while Python parses the
+        previous result. Responses come back in submission order.
 
-                while True:
-                    if time.time() - start_time > timeout:
-                        raise TimeoutError(f"Query timeout after {timeout}s")
+        Args:
+            queries: SQL queries to execute
+            timeout: Per-query timeout in seconds
 
-                    # Try to read line with small timeout
-                    if self.process.stdout in []:
-                        time.sleep(0.1)
-                        continue
+        Returns:
+            One result dictionary per query, in the same order
+        """
+        if self.process is None or self.process.poll() is not None:
+            raise RuntimeError(f"Connection {self.connection_id} is not running")
 
-                    result_line = self.process.stdout.readline()
-                    if result_line:
+        results: List[Dict[str, Any]] = []
+        in_flight: "deque[int]" = deque()  # Encoded sizes of unanswered queries
+        in_flight_bytes = 0
+        next_query = 0
+        try:
+            while len(results) < len(queries):
+                # Keep writing while the unanswered queries still fit in
+                # the pipe buffer; beyond that the worker could block on
+                # a full stdout while we block on a full stdin
+                batch = []
+                while next_query < len(queries):
+                    size = _FRAME_HEADER.size + len(queries[next_query].encode("utf-8"))
+                    if in_flight and in_flight_bytes + size > self.PIPELINE_WINDOW:
                         break
+                    batch.append(queries[next_query])
+                    in_flight.append(size)
+                    in_flight_bytes += size
+                    next_query += 1
+                if batch:
+                    self._send(batch)
 
-                    if self.process.poll() is not None:
-                        raise RuntimeError(f"Connection {self.connection_id} died unexpectedly")
+                results.append(_json_loads(self._read_frame(timeout)))
+                in_flight_bytes -= in_flight.popleft()
+            self.stats.record(len(queries))
 
-                    time.sleep(0.1)
+        except Exception as e:
+            logger.error(f"Batch execution failed on connection {self.connection_id}: {e}")
+            if isinstance(e, TimeoutError):
+                self.stop()
+            error = {
+                'success': False,
+                'error': f"Connection error: {str(e)}"
+            }
+            results.extend(dict(error) for _ in range(len(queries) - len(results)))
 
-                # Parse response
-                response = json.loads(result_line)
-                self.last_used = time.time()
-                return response
+        return results
 
-            except Exception as e:
-                logger.error(f"Query execution failed on connection {self.connection_id}: {e}")
-                return {
-                    'success': False,
-                    'error': f"Connection error: {str(e)}"
-                }
-            finally:
-                self.is_busy = False
+    def prepare(self, sql: str, timeout: float = 5.0) -> int:
+        """
+        Prepare a statement on the worker, reusing a cached handle if possible.
+
+        Args:
+            sql: SQL text, optionally with ? bind placeholders
+            timeout: Seconds to wait for the worker
 
-    def ping(self) -> bool:
+        Returns:
+            Statement handle for execute_prepared()
+
+        Raises:
+            RuntimeError: If the worker is not running or rejects the SQL
+        """
+        if self.process is None or self.process.poll() is not None:
+            raise RuntimeError(f"Connection {self.connection_id} is not running")
+
+        response = self._prepare_cached(sql, timeout)
+        if not response.get('success'):
+            raise RuntimeError(response.get('error', 'Prepare failed'))
+        return response['handle']
+
+    def execute_prepared(self, handle: int, params: Sequence[Any] = (), timeout: float = 5.0) -> Dict[str, Any]:
+        """
+        Execute a prepared statement.
+
+        Args:
+            handle: Handle returned by prepare()
+            params: Values for the statement's bind placeholders
+            timeout: Query timeout in seconds
+
+        Returns:
+            Query result dictionary
+        """
+        if self.process is None or self.process.poll() is not None:
+            raise RuntimeError(f"Connection {self.connection_id} is not running")
+
+        try:
+            response = self._request(f"EXEC\t{handle}\t{json.dumps(list(params))}", timeout)
+            self.stats.record(1)
+            return response
+        except Exception as e:
+            return self._request_failed(e)
+
+    def execute_statement(self, sql: str, params: Sequence[Any] = (), timeout: float = 5.0) -> Dict[str, Any]:
+        """
+        Execute SQL through the worker's prepared statement cache.
+
+        The first call for a given SQL text prepares it; later calls only
+        bind and execute, skipping Oracle's parse and plan step.
+
+        Args:
+            sql: SQL text, optionally with ? bind placeholders
+            params: Values for the bind placeholders
+            timeout: Query timeout in seconds
+
+        Returns:
+            Query result dictionary
+        """
+        if self.process is None or self.process.poll() is not None:
+            raise RuntimeError(f"Connection {self.connection_id} is not running")
+
+        try:
+            exec_params = json.dumps(list(params))
+            for _ in range(2):
+                prepared = self._prepare_cached(sql, timeout)
+                if not prepared.get('success'):
+                    return prepared
+
+                response = self._request(f"EXEC\t{prepared['handle']}\t{exec_params}", timeout)
+                if not response.get('unknown_handle'):
+                    self.stats.record(1)
+                    return response
+
+                # Worker reconnected to the database and dropped its
+                # statements; prepare again and retry once
+                self._statements.pop(sql, None)
+            return response
+        except Exception as e:
+            return self._request_failed(e)
+
+    def _prepare_cached(self, sql: str, timeout: float) -> Dict[str, Any]:
+        """Prepare sql (or return its cached handle); caller owns the connection."""
+        handle = self._statements.get(sql)
+        if handle is not None:
+            self._statements.move_to_end(sql)
+            return {'success': True, 'handle': handle}
+
+        response = self._request("PREPARE\t" + sql, timeout)
+        if response.get('success'):
+            self._statements[sql] = response['handle']
+            if len(self._statements) > self.STATEMENT_CACHE_SIZE:
+                _, evicted = self._statements.popitem(last=False)
+                self._request(f"CLOSE\t{evicted}", timeout)
+        return response
+
+    def _request(self, message: str, timeout: float) -> Dict[str, Any]:
+        """Send one message and wait for its response; caller owns the connection."""
+        self._send([message])
+        return _json_loads(self._read_frame(timeout))
+
+    def _request_failed(self, e: Exception) -> Dict[str, Any]:
+        """Log a failed request and build its error result."""
+        logger.error(f"Query execution failed on connection {self.connection_id}: {e}")
+        if isinstance(e, TimeoutError):
+            # The late response would be read as the answer to the next
+            # request, so this worker can no longer be trusted
+            self.stop()
+        return {
+            'success': False,
+            'error': f"Connection error: {str(e)}"
+        }
+
+    def ping(self, timeout: float = 2.0) -> bool:
         """
         Check if connection is alive.
 
+        Args:
+            timeout: Seconds to wait for the PING response
+
         Returns:
             True if alive, False otherwise
         """
         try:
-            with self.lock:
-                if self.process is None or self.process.poll() is not None:
-                    return False
+            if self.process is None or self.process.poll() is not None:
+                return False
 
-                self.process.stdin.write("PING\n")
-                self.process.stdin.flush()
+            self._send(["PING"])
 
-                response_line = self.process.stdout.readline()
-                response = json.loads(response_line)
+            response = _json_loads(self._read_frame(timeout))
 
-                return response.get('status') == 'alive' and response.get('connected', False)
+            return response.get('status') == 'alive' and response.get('connected', False)
         except Exception as e:
             logger.error(f"Ping failed on connection {self.connection_id}: {e}")
+            if isinstance(e, TimeoutError):
+                self.stop()
             return False
 
+    def _send(self, messages: List[str]):
+        """
+        Write messages to the worker as length-prefixed frames.
+
+        Args:
+            messages: Payloads to send (queries or PING/EXIT commands)
+        """
+        frames = _encode_frames(messages)
+
+        # One os.write per batch on the raw fd: a typical query frame fits
+        # in PIPE_BUF and goes out in a single syscall. Larger batches may
+        # be accepted in pieces, so keep writing the remainder.
+        fd = self.process.stdin.fileno()
+        with memoryview(frames) as view:
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+
+    def _wait_readable(self, deadline: float, timeout: float):
+        """
+        Block until the worker's stdout has data.
+
+        Args:
+            deadline: time.monotonic() value after which to give up
+            timeout: Original timeout, for the error message
+
+        Raises:
+            TimeoutError: If nothing arrives before the deadline
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not self.selector.select(remaining):
+            raise TimeoutError(f"Query timeout after {timeout}s")
+
+    def _read_exact(self, n: int, deadline: float, timeout: float):
+        """
+        Fill the read buffer until it holds at least n bytes.
+
+        Args:
+            n: Number of bytes required
+            deadline: time.monotonic() value after which to give up
+            timeout: Original timeout, for the error message
+
+        Raises:
+            TimeoutError: If the bytes do not arrive before the deadline
+            RuntimeError: If the worker closed its stdout
+        """
+        fd = self.process.stdout.fileno()
+        while len(self._rbuf) < n:
+            self._wait_readable(deadline, timeout)
+
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise RuntimeError(f"Connection {self.connection_id} died unexpectedly")
+            self._rbuf += chunk
+
+    def _read_frame(self, timeout: float) -> bytearray:
+        """
+        Read one response frame from the worker.
+
+        Small frames are sliced out of the shared read buffer. Larger ones
+        are read straight from the pipe into a buffer of exactly the frame's
+        size, so a multi-megabyte result is copied once rather than
+        accumulated chunk by chunk.
+
+        Args:
+            timeout: Seconds to wait for the whole frame to arrive
+
+        Returns:
+            Raw UTF-8 JSON payload
+
+        Raises:
+            TimeoutError: If no complete frame arrives within the timeout
+            RuntimeError: If the worker closed its stdout
+        """
+        deadline = time.monotonic() + timeout
+        header_size = _FRAME_HEADER.size
+
+        self._read_exact(header_size, deadline, timeout)
+        (length,) = _FRAME_HEADER.unpack_from(self._rbuf)
+        end = header_size + length
+
+        if len(self._rbuf) >= end:
+            payload = self._rbuf[header_size:end]
+            del self._rbuf[:end]
+            return payload
+
+        # Move what we already have into the payload, then let readinto fill
+        # the rest; reads stop at the frame boundary so any pipelined frames
+        # behind this one stay in the pipe
+        have = len(self._rbuf) - header_size
+        payload = bytearray(length)
+        payload[:have] = self._rbuf[header_size:]
+        self._rbuf.clear()
+
+        with memoryview(payload) as view:
+            while have < length:
+                self._wait_readable(deadline, timeout)
+
+                n = self.process.stdout.readinto(view[have:])
+                if not n:
+                    raise RuntimeError(f"Connection {self.connection_id} died unexpectedly")
+                have += n
+
+        return payload
+
     def stop(self):
         """Stop the Java subprocess."""
         if self.process is None:
@@ -171,8 +540,7 @@ class Connection:
         logger.info(f"Stopping connection {self.connection_id}")
         try:
             # Send EXIT command
-            self.process.stdin.write("EXIT\n")
-            self.process.stdin.flush()
+            self._send(["EXIT"])
 
             # Wait for graceful shutdown
             self.process.wait(timeout=2)
@@ -180,6 +548,9 @@ class Connection:
             # Force kill if graceful shutdown fails
             self.process.kill()
         finally:
+            if self.selector is not None:
+                self.selector.close()
+                self.selector = None
             self.process = None
 
     def is_alive(self) -> bool:
@@ -187,13 +558,31 @@ class Connection:
         return self.process is not None and self.process.poll() is None
 
 
+def _error_result(error: str) -> Dict[str, Any]:
+    """Build the result dictionary for a query that could not run."""
+    return {'success': False, 'error': error}
+
+
 class ConnectionPool:
     """
-    Manages a pool of Oracle database connections with maximum 2 concurrent connections.
+    Manages a pool of Oracle database connections (2 concurrent connections by default).
     Implements connection pooling with health checks and automatic reconnection.
     """
 
-    def __init__(self, jdbc_url: str, user: str, password: str, java_bin: Path, classpath: str, work_dir: Path):
+    # Seconds after a failed worker restart during which queries fail
+    # immediately if no worker is alive
+    RESTART_BACKOFF = 5.0
+
+    def __init__(
+        self,
+        jdbc_url: str,
+        user: str,
+        password: str,
+        java_bin: Path,
+        classpath: str,
+        work_dir: Path,
+        max_connections: int = 2
+    ):
         """
         Initialize connection pool.
 
@@ -204,6 +593,7 @@ class ConnectionPool:
             java_bin: Path to Java binary
             classpath: Java classpath
             work_dir: Working directory for subprocesses
+            max_connections: Number of JVM workers (concurrent queries)
         """
         self.jdbc_url = jdbc_url
         self.user = user
@@ -212,16 +602,28 @@ class ConnectionPool:
         self.classpath = classpath
         self.work_dir = work_dir
 
-        # Environment with credentials
-        self.env = os.environ.copy()
-        self.env['ORACLE_USER'] = user
-        self.env['ORACLE_PASSWORD'] = password
+        # Environment with credentials, built in one pass and shared by every
+        # Connection; Popen serialises it into its own argv-style list on
+        # each spawn, so no further copy is needed
+        self.env = dict(os.environ, ORACLE_USER=user, ORACLE_PASSWORD=password)
 
         # Pool configuration
-        self.max_connections = 2
+        if max_connections < 1:
+            raise ValueError(f"max_connections must be at least 1, got {max_connections}")
+        self.max_connections = max_connections
         self.connections: List[Connection] = []
         self.pool_lock = threading.Lock()
-        self.query_queue = queue.Queue()
+
+        # Idle connections; a connection taken off this deque is owned by
+        # exactly one caller until it is released. Callers waiting for a
+        # connection queue up in _waiters and are served in arrival order.
+        self.idle: "deque[Connection]" = deque()
+        self._waiters: "deque[object]" = deque()
+        self._cond = threading.Condition()
+
+        # monotonic() time of the last failed worker restart, if the most
+        # recent attempt failed
+        self._restart_failed_at: Optional[float] = None
 
         # Initialize connections
         self._initialize_pool()
@@ -229,9 +631,9 @@ class ConnectionPool:
         logger.info(f"Connection pool initialized with {self.max_connections} connections")
 
     def _initialize_pool(self):
-        """Initialize the connection pool with 2 connections."""
-        for i in range(self.max_connections):
-            conn = Connection(
+        """Initialize the pool's connections, started concurrently."""
+        conns = [
+            Connection(
                 connection_id=i,
                 java_bin=self.java_bin,
                 classpath=self.classpath,
@@ -239,12 +641,64 @@ class ConnectionPool:
                 work_dir=self.work_dir,
                 env=self.env
             )
+            for i in range(self.max_connections)
+        ]
+
+        # JVM startup and database login dominate pool construction, so
+        # overlap them instead of waiting for each worker in turn
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.max_connections) as executor:
+            futures = {executor.submit(conn.start): conn for conn in conns}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Failed to start connection {futures[future].connection_id}: {e}")
+                    errors.append(e)
+
+        if errors:
+            # Don't leave the workers that did come up running
+            for conn in conns:
+                conn.stop()
+            raise errors[0]
+
+        self.connections.extend(conns)
+        self.idle.extend(conns)
+
+    def _acquire(self, timeout: float) -> Optional[Connection]:
+        """
+        Take an idle connection, blocking until one is released.
+
+        Waiters are served FIFO so a steady stream of new callers cannot
+        starve one that has been waiting longer.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            Connection owned by the caller, or None on timeout
+        """
+        deadline = time.monotonic() + timeout
+        ticket = object()
+        with self._cond:
+            self._waiters.append(ticket)
             try:
-                conn.start()
-                self.connections.append(conn)
-            except Exception as e:
-                logger.error(f"Failed to start connection {i}: {e}")
-                raise
+                while self._waiters[0] is not ticket or not self.idle:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+                return self.idle.popleft()
+            finally:
+                self._waiters.remove(ticket)
+                # Wake the next waiter in line (it may now be at the head)
+                self._cond.notify_all()
+
+    def _release(self, conn: Connection):
+        """Return a connection to the idle set and wake waiters."""
+        with self._cond:
+            self.idle.append(conn)
+            self._cond.notify_all()
 
     def execute(self, query: str, timeout: float = 5.0) -> Dict[str, Any]:
         """
@@ -257,59 +711,172 @@ class ConnectionPool:
         Returns:
             Query result dictionary
         """
+        return self._run(lambda conn: conn.execute(query, timeout))
+
+    def execute_prepared(self, sql: str, params: Sequence[Any] = (), timeout: float = 5.0) -> Dict[str, Any]:
+        """
+        Execute SQL as a cached prepared statement on an available connection.
+
+        Args:
+            sql: SQL text, optionally with ? bind placeholders
+            params: Values for the bind placeholders
+            timeout: Query timeout in seconds
+
+        Returns:
+            Query result dictionary
+        """
+        return self._run(lambda conn: conn.execute_statement(sql, params, timeout))
+
+    def _run(self, call: Callable[[Connection], Any], fail: Callable[[str], Any] = _error_result) -> Any:
+        """
+        Run call on an idle connection, restarting it first if it died.
+
+        Args:
+            call: Request to make on the checked-out connection
+            fail: Builds the result returned for an error message
+
+        Returns:
+            Result of call, or fail(error)
+        """
+        # When every worker is dead and the last restart attempt just
+        # failed, trying again per query only adds a JVM launch to each
+        # error; fail immediately until the backoff has passed
+        failed_at = self._restart_failed_at
+        if failed_at is not None and time.monotonic() - failed_at < self.RESTART_BACKOFF:
+            if not any(conn.is_alive() for conn in self.connections):
+                logger.error("All connections are down; skipping restart during backoff")
+                return fail("All connections are down")
+
         # Wait for available connection
         max_wait_time = 30.0  # 30 seconds max wait for connection
-        start_wait = time.time()
-
-        while True:
-            # Find available connection
-            with self.pool_lock:
-                for conn in self.connections:
-                    if not conn.is_busy and conn.is_alive():
-                        try:
-                            result = conn.execute(query, timeout)
-                            return result
-                        except Exception as e:
-                            logger.error(f"Connection {conn.connection_id} failed: {e}")
-                            # Try to restart connection
-                            conn.stop()
-                            conn.start()
-                            continue
-
-            # Check if we've exceeded max wait time
-            if time.time() - start_wait > max_wait_time:
-                return {
-                    'success': False,
-                    'error': f"No available connections after {max_wait_time}s"
-                }
-
-            # Wait a bit before retrying
-            time.sleep(0.1)
-
-    def health_check(self) -> Dict[str, Any]:
+
+        conn = self._acquire(max_wait_time)
+        if conn is None:
+            return fail(f"No available connections after {max_wait_time}s")
+
+        try:
+            if not conn.is_alive():
+                # Worker crashed or was stopped after a timeout - restart it
+                logger.warning(f"Connection {conn.connection_id} is down, restarting")
+                conn.stop()
+                try:
+                    conn.start()
+                except Exception:
+                    self._restart_failed_at = time.monotonic()
+                    raise
+                self._restart_failed_at = None
+
+            return call(conn)
+        except Exception as e:
+            logger.error(f"Connection {conn.connection_id} failed: {e}")
+            return fail(f"Connection error: {str(e)}")
+        finally:
+            self._release(conn)
+
+    def execute_many(self, queries: List[str], timeout: float = 5.0) -> List[Dict[str, Any]]:
+        """
+        Execute a batch of queries pipelined over one pooled connection.
+
+        Args:
+            queries: SQL queries to execute
+            timeout: Per-query timeout in seconds
+
+        Returns:
+            One result dictionary per query, in the same order
+        """
+        if not queries:
+            return []
+
+        return self._run(
+            lambda conn: conn.execute_many(queries, timeout),
+            lambda error: [_error_result(error) for _ in queries]
+        )
+
+    def health_check(self, timeout: float = 5.0) -> Dict[str, Any]:
         """
         Check health of all connections in the pool.
 
+        Each connection is checked out of the pool like a query would be,
+        then pinged; pings run concurrently, so one slow worker doesn't
+        delay the others' checks. Connections still serving queries when
+        the timeout expires are reported as busy rather than pinged. Each
+        ping gets the usual ping timeout even near the end of the check,
+        so a worker is only stopped when it fails to answer in that time.
+
+        Args:
+            timeout: Wall-clock limit for the whole check; connections that
+                have not answered by then count as unhealthy
+
         Returns:
             Health status dictionary
         """
         with self.pool_lock:
-            healthy = 0
-            unhealthy = 0
+            total = len(self.connections)
 
-            for conn in self.connections:
-                if conn.ping():
-                    healthy += 1
-                else:
-                    unhealthy += 1
-                    logger.warning(f"Connection {conn.connection_id} is unhealthy")
-
-            return {
-                'total_connections': len(self.connections),
-                'healthy': healthy,
-                'unhealthy': unhealthy,
-                'all_healthy': unhealthy == 0
-            }
+        if not total:
+            return {'total_connections': 0, 'healthy': 0, 'unhealthy': 0, 'busy': 0, 'all_healthy': True}
+
+        deadline = time.monotonic() + timeout
+        executor = ThreadPoolExecutor(max_workers=total)
+        futures = {}
+
+        # Pinged connections are held until every connection has been
+        # checked out, so the same one can't be acquired twice; after
+        # that, a ping that outlives the check releases its own connection
+        held: List[Connection] = []
+        held_lock = threading.Lock()
+        collecting = True
+
+        def on_ping_done(conn: Connection):
+            with held_lock:
+                if collecting:
+                    held.append(conn)
+                    return
+            self._release(conn)
+
+        try:
+            try:
+                for _ in range(total):
+                    conn = self._acquire(max(0.0, deadline - time.monotonic()))
+                    if conn is None:
+                        break
+                    if time.monotonic() >= deadline:
+                        # Freed too late to be checked; still counts as busy
+                        self._release(conn)
+                        break
+                    # Full ping timeout, not what is left of the check: a
+                    # ping timeout stops the worker, and one cut short here
+                    # would kill a healthy worker that just ran a slow query
+                    future = executor.submit(conn.ping)
+                    future.add_done_callback(lambda _, conn=conn: on_ping_done(conn))
+                    futures[future] = conn
+            finally:
+                with held_lock:
+                    collecting = False
+                for conn in held:
+                    self._release(conn)
+
+            done, _ = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        finally:
+            # Don't wait for stragglers; they are already counted unhealthy
+            executor.shutdown(wait=False)
+
+        healthy = 0
+        unhealthy = 0
+        for future, conn in futures.items():
+            if future in done and future.result():
+                healthy += 1
+            else:
+                unhealthy += 1
+                logger.warning(f"Connection {conn.connection_id} is unhealthy")
+
+        return {
+            'total_connections': total,
+            'healthy': healthy,
+            'unhealthy': unhealthy,
+            'busy': total - len(futures),
+            'all_healthy': unhealthy == 0
+        }
 
     def shutdown(self):
         """Shutdown all connections in the pool."""
@@ -320,6 +887,399 @@ class ConnectionPool:
         logger.info("Connection pool shutdown complete")
 
 
+class AsyncConnection:
+    """
+    Asyncio counterpart of Connection, driving the worker through asyncio streams.
+
+    Waiting for a response suspends the coroutine instead of parking an OS
+    thread, so an event loop can keep other work going while queries run.
+    Like Connection, it must only be used by the task that checked it out
+    of the pool.
+    """
+
+    def __init__(self, connection_id: int, java_bin: Path, classpath: str, jdbc_url: str, work_dir: Path, env: dict):
+        """
+        Initialize an asyncio connection.
+
+        Args:
+            connection_id: Unique identifier for this connection
+            java_bin: Path to Java binary
+            classpath: Java classpath
+            jdbc_url: JDBC connection URL
+            work_dir: Directory that relative classpath entries are resolved against
+            env: Environment variables (including credentials)
+        """
+        self.connection_id = connection_id
+        self.env = env
+        self._argv = _worker_argv(java_bin, classpath, jdbc_url, work_dir)
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.stats = Stats()
+
+    async def start(self):
+        """Start the Java subprocess and wait for its ready signal."""
+        if self.process is not None:
+            logger.warning(f"Connection {self.connection_id} already started")
+            return
+
+        logger.info(f"Starting async connection {self.connection_id}")
+        self.process = await asyncio.create_subprocess_exec(
+            *self._argv,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=self.env
+        )
+        self.stats.started_ns = time.monotonic_ns()
+
+        # Wait for ready signal (JVM startup plus database login)
+        try:
+            ready_response = _json_loads(await self._read_frame(30.0))
+            if ready_response.get('status') == 'ready':
+                logger.info(f"Connection {self.connection_id} ready: {ready_response.get('message')}")
+            else:
+                raise RuntimeError(f"Unexpected ready response: {ready_response}")
+        except Exception as e:
+            logger.error(f"Failed to start connection {self.connection_id}: {e}")
+            await self.stop()
+            raise
+
+    async def execute(self, query: str, timeout: float = 5.0) -> Dict[str, Any]:
+        """
+        Execute query on this connection.
+
+        Args:
+            query: SQL query to execute
+            timeout: Query timeout in seconds
+
+        Returns:
+            Query result dictionary
+        """
+        return (await self.execute_many([query], timeout))[0]
+
+    async def execute_many(self, queries: List[str], timeout: float = 5.0) -> List[Dict[str, Any]]:
+        """
+        Execute several queries in one pipe round-trip.
+
+        Queries are written by a separate task while responses are being
+        read, so a large batch cannot deadlock on full pipe buffers and no
+        explicit pipelining window is needed.
+
+        Args:
+            queries: SQL queries to execute
+            timeout: Per-query timeout in seconds
+
+        Returns:
+            One result dictionary per query, in the same order
+        """
+        if not self.is_alive():
+            raise RuntimeError(f"Connection {self.connection_id} is not running")
+
+        results: List[Dict[str, Any]] = []
+        stdin = self.process.stdin
+        stdin.write(_encode_frames(queries))
+        writer = asyncio.ensure_future(stdin.drain())
+        try:
+            for _ in queries:
+                results.append(_json_loads(await self._read_frame(timeout)))
+            await writer
+            self.stats.record(len(queries))
+
+        except Exception as e:
+            writer.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                e = TimeoutError(f"Query timeout after {timeout}s")
+            logger.error(f"Query execution failed on connection {self.connection_id}: {e}")
+            if isinstance(e, TimeoutError):
+                # A late response would be read as the answer to the next
+                # query, so this worker can no longer be trusted
+                await self.stop()
+            error = {
+                'success': False,
+                'error': f"Connection error: {str(e)}"
+            }
+            results.extend(dict(error) for _ in range(len(queries) - len(results)))
+
+        return results
+
+    async def ping(self, timeout: float = 2.0) -> bool:
+        """
+        Check if connection is alive.
+
+        Args:
+            timeout: Seconds to wait for the PING response
+
+        Returns:
+            True if alive, False otherwise
+        """
+        try:
+            if not self.is_alive():
+                return False
+
+            self.process.stdin.write(_encode_frames(["PING"]))
+            await self.process.stdin.drain()
+
+            response = _json_loads(await self._read_frame(timeout))
+            return response.get('status') == 'alive' and response.get('connected', False)
+        except Exception as e:
+            logger.error(f"Ping failed on connection {self.connection_id}: {e!r}")
+            if isinstance(e, asyncio.TimeoutError):
+                await self.stop()
+            return False
+
+    async def _read_frame(self, timeout: float) -> bytes:
+        """
+        Read one response frame from the worker.
+
+        Args:
+            timeout: Seconds to wait for the whole frame to arrive
+
+        Returns:
+            Raw UTF-8 JSON payload
+
+        Raises:
+            asyncio.TimeoutError: If no complete frame arrives within the timeout
+            RuntimeError: If the worker closed its stdout
+        """
+        async def read() -> bytes:
+            header = await self.process.stdout.readexactly(_FRAME_HEADER.size)
+            (length,) = _FRAME_HEADER.unpack(header)
+            return await self.process.stdout.readexactly(length)
+
+        try:
+            return await asyncio.wait_for(read(), timeout)
+        except asyncio.IncompleteReadError:
+            raise RuntimeError(f"Connection {self.connection_id} died unexpectedly")
+
+    async def stop(self):
+        """Stop the Java subprocess."""
+        if self.process is None:
+            return
+
+        logger.info(f"Stopping async connection {self.connection_id}")
+        process, self.process = self.process, None
+        try:
+            # Send EXIT command and wait for graceful shutdown
+            process.stdin.write(_encode_frames(["EXIT"]))
+            await process.stdin.drain()
+            await asyncio.wait_for(process.wait(), 2)
+        except Exception:
+            # Force kill if graceful shutdown fails
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+    def is_alive(self) -> bool:
+        """Check if subprocess is running."""
+        return self.process is not None and self.process.returncode is None
+
+
+class AsyncConnectionPool:
+    """
+    Asyncio counterpart of ConnectionPool (2 concurrent connections by default).
+
+    Create it with ``pool = await AsyncConnectionPool.create(...)``. Idle
+    connections wait in an asyncio.Queue, which wakes waiters FIFO as soon
+    as a connection is returned.
+    """
+
+    def __init__(
+        self,
+        jdbc_url: str,
+        user: str,
+        password: str,
+        java_bin: Path,
+        classpath: str,
+        work_dir: Path,
+        max_connections: int = 2
+    ):
+        """
+        Initialize the pool without starting any workers; see create().
+
+        Args:
+            jdbc_url: JDBC connection URL
+            user: Database user
+            password: Database password
+            java_bin: Path to Java binary
+            classpath: Java classpath
+            work_dir: Directory that relative classpath entries are resolved against
+            max_connections: Number of JVM workers (concurrent queries)
+        """
+        env = dict(os.environ, ORACLE_USER=user, ORACLE_PASSWORD=password)
+
+        if max_connections < 1:
+            raise ValueError(f"max_connections must be at least 1, got {max_connections}")
+        self.max_connections = max_connections
+        self.connections: List[AsyncConnection] = [
+            AsyncConnection(i, java_bin, classpath, jdbc_url, work_dir, env)
+            for i in range(self.max_connections)
+        ]
+        self.idle: "asyncio.Queue[AsyncConnection]" = asyncio.Queue()
+
+    @classmethod
+    async def create(cls, *args, **kwargs) -> "AsyncConnectionPool":
+        """
+        Build a pool and start its workers concurrently.
+
+        Accepts the same arguments as __init__.
+
+        Returns:
+            Started pool
+        """
+        pool = cls(*args, **kwargs)
+        results = await asyncio.gather(
+            *(conn.start() for conn in pool.connections),
+            return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            await pool.shutdown()
+            raise errors[0]
+
+        for conn in pool.connections:
+            pool.idle.put_nowait(conn)
+        logger.info(f"Async connection pool initialized with {pool.max_connections} connections")
+        return pool
+
+    async def execute(self, query: str, timeout: float = 5.0) -> Dict[str, Any]:
+        """
+        Execute query using an available connection from the pool.
+
+        Args:
+            query: SQL query to execute
+            timeout: Query timeout in seconds
+
+        Returns:
+            Query result dictionary
+        """
+        return (await self.execute_many([query], timeout))[0]
+
+    async def execute_many(self, queries: List[str], timeout: float = 5.0) -> List[Dict[str, Any]]:
+        """
+        Execute a batch of queries pipelined over one pooled connection.
+
+        Args:
+            queries: SQL queries to execute
+            timeout: Per-query timeout in seconds
+
+        Returns:
+            One result dictionary per query, in the same order
+        """
+        if not queries:
+            return []
+
+        max_wait_time = 30.0
+
+        try:
+            conn = await asyncio.wait_for(self.idle.get(), max_wait_time)
+        except asyncio.TimeoutError:
+            error = f"No available connections after {max_wait_time}s"
+            return [{'success': False, 'error': error} for _ in queries]
+
+        try:
+            if not conn.is_alive():
+                logger.warning(f"Connection {conn.connection_id} is down, restarting")
+                await conn.stop()
+                await conn.start()
+
+            return await conn.execute_many(queries, timeout)
+        except Exception as e:
+            logger.error(f"Connection {conn.connection_id} failed: {e}")
+            error = f"Connection error: {str(e)}"
+            return [{'success': False, 'error': error} for _ in queries]
+        finally:
+            self.idle.put_nowait(conn)
+
+    async def health_check(self, timeout: float = 5.0) -> Dict[str, Any]:
+        """
+        Ping every idle connection concurrently.
+
+        Connections are checked out of the pool before being pinged;
+        those still serving queries when the timeout expires are reported
+        as busy. Each ping gets the usual ping timeout even near the end
+        of the check, so a worker is only stopped when it fails to answer
+        in that time, and the check can run that much past the timeout.
+
+        Args:
+            timeout: Wall-clock limit for checking connections out
+
+        Returns:
+            Health status dictionary
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        total = len(self.connections)
+        results: Dict[int, bool] = {}  # connection_id -> ping result
+        holders = set()  # Tasks that have checked out a connection
+        all_checked_out = asyncio.Event()
+
+        async def check():
+            conn = await self.idle.get()
+            if loop.time() >= deadline:
+                # Freed too late to be checked; still counts as busy
+                self.idle.put_nowait(conn)
+                return
+            holders.add(asyncio.current_task())
+            results[conn.connection_id] = False
+            if len(results) == total:
+                all_checked_out.set()
+            try:
+                # Full ping timeout: a ping timeout stops the worker
+                results[conn.connection_id] = await conn.ping()
+                # Hold the connection so another check can't pick it again
+                await all_checked_out.wait()
+            finally:
+                self.idle.put_nowait(conn)
+
+        tasks = [asyncio.ensure_future(check()) for _ in range(total)]
+        try:
+            await asyncio.wait_for(all_checked_out.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # Let holders go and stop waiting for connections still in use
+            all_checked_out.set()
+            for task in tasks:
+                if task not in holders:
+                    task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        healthy = sum(1 for ok in results.values() if ok)
+        unhealthy = len(results) - healthy
+        return {
+            'total_connections': total,
+            'healthy': healthy,
+            'unhealthy': unhealthy,
+            'busy': total - len(results),
+            'all_healthy': unhealthy == 0
+        }
+
+    async def shutdown(self):
+        """Shutdown all connections in the pool."""
+        logger.info("Shutting down async connection pool")
+        await asyncio.gather(*(conn.stop() for conn in self.connections))
+        logger.info("Async connection pool shutdown complete")
+
+
+@functools.lru_cache(maxsize=None)
+def _validate_paths(java_bin: Path, jdbc_jar: Path, json_jar: Path):
+    """
+    Check that the Java binary and jars exist.
+
+    Successful checks are cached, so constructing further OracleJDBC
+    instances with the same paths costs no stat() calls. Failures raise
+    and are not cached, so a missing file is rechecked next time.
+
+    Raises:
+        FileNotFoundError: If any of the paths is missing
+    """
+    if not java_bin.exists():
+        raise FileNotFoundError(f"Java not found at {java_bin}")
+    if not jdbc_jar.exists():
+        raise FileNotFoundError(f"JDBC driver not found at {jdbc_jar}")
+    if not json_jar.exists():
+        raise FileNotFoundError(f"JSON library not found at {json_jar}")
+
+
 class OracleJDBC:
     """Oracle database connection using JDBC through Java subprocess with connection pooling."""
 
@@ -329,7 +1289,8 @@ class OracleJDBC:
         port: int = 10006,
         service_name: str = "ylvoprd",
         user: str = "username",
-        password: str = "password"
+        password: str = "password",
+        pool_size: int = 2
     ):
         """
         Initialize Oracle JDBC connection with connection pooling.
@@ -340,13 +1301,14 @@ class OracleJDBC:
             service_name: Oracle service name
             user: Database user
             password: Database password
+            pool_size: Number of pooled JVM workers (default: 2). Ignored
+                when a pool for the same database and user already exists.
         """
         self.jdbc_url = f"jdbc:oracle:thin:@{host}:{port}/{service_name}"
         self.user = user
         self.password = password
 
         # Paths
-        import os
         self.java_home = Path(os.getenv("JAVA_HOME", "/opt/homebrew/opt/openjdk@21"))
         self.java_bin = self.java_home / "bin" / "java"
         self.work_dir = Path(__file__).parent
@@ -371,27 +1333,37 @@ class OracleJDBC:
         self.json_jar = self.work_dir / "json.jar"
 
         # Validate paths
-        if not self.java_bin.exists():
-            raise FileNotFoundError(f"Java not found at {self.java_bin}")
-        if not self.jdbc_jar.exists():
-            raise FileNotFoundError(f"JDBC driver not found at {self.jdbc_jar}")
-        if not self.json_jar.exists():
-            raise FileNotFoundError(f"JSON library not found at {self.json_jar}")
+        _validate_paths(self.java_bin, self.jdbc_jar, self.json_jar)
 
         # Build classpath
         classpath = f".:{self.json_jar}:{self.jdbc_jar}"
 
-        # Initialize connection pool with 2 max connections
-        self.pool = ConnectionPool(
-            jdbc_url=self.jdbc_url,
-            user=user,
-            password=password,
-            java_bin=self.java_bin,
-            classpath=classpath,
-            work_dir=self.work_dir
-        )
-
-        logger.info("OracleJDBC initialized with connection pooling (max 2 connections)")
+        # Reuse the pool (and its JVM workers) of any other instance
+        # connected to the same database as the same user
+        self._pool_key = (self.jdbc_url, user)
+        with _POOL_CACHE_LOCK:
+            pool = _POOL_CACHE.get(self._pool_key)
+            if pool is None:
+                pool = ConnectionPool(
+                    jdbc_url=self.jdbc_url,
+                    user=user,
+                    password=password,
+                    java_bin=self.java_bin,
+                    classpath=classpath,
+                    work_dir=self.work_dir,
+                    max_connections=pool_size
+                )
+                _POOL_CACHE[self._pool_key] = pool
+                _POOL_REFS[self._pool_key] = 0
+            _POOL_REFS[self._pool_key] += 1
+        self.pool = pool
+        self._pool_released = False
+
+        # Make sure the long-lived Java workers receive EXIT even if the caller
+        # never calls shutdown() explicitly
+        atexit.register(self.shutdown)
+
+        logger.info(f"OracleJDBC initialized with connection pooling (max {pool.max_connections} connections)")
 
     def execute(self, query: str) -> Dict[str, Any]:
         """
@@ -412,12 +1384,42 @@ class OracleJDBC:
         # Use connection pool to execute query
         return self.pool.execute(query, timeout=5.0)
 
-    def query(self, sql: str) -> List[Dict[str, Any]]:
+    def execute_many(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Execute several SQL queries in a single pipelined round-trip.
+
+        Args:
+            queries: SQL queries to execute
+
+        Returns:
+            List of result dictionaries (same structure as execute()),
+            one per query in submission order
+        """
+        return self.pool.execute_many(queries, timeout=5.0)
+
+    def execute_prepared(self, sql: str, params: Sequence[Any] = ()) -> Dict[str, Any]:
+        """
+        Execute SQL as a prepared statement, reusing it on repeated calls.
+
+        Each worker keeps the statements it has prepared, so running the
+        same SQL text again skips Oracle's parse and plan step.
+
+        Args:
+            sql: SQL query, optionally with ? bind placeholders
+            params: Values for the bind placeholders
+
+        Returns:
+            Same structure as execute()
+        """
+        return self.pool.execute_prepared(sql, params, timeout=5.0)
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
         """
         Execute SQL query and return rows only.
 
         Args:
-            sql: SQL query to execute
+            sql: SQL query to execute, optionally with ? bind placeholders
+            params: Values for the bind placeholders
 
         Returns:
             List of row dictionaries
@@ -425,7 +1427,7 @@ class OracleJDBC:
         Raises:
             RuntimeError: If query fails
         """
-        result = self.execute(sql)
+        result = self.execute_prepared(sql, params)
 
         if not result.get('success'):
             error_msg = result.get('error', 'Unknown error')
@@ -433,12 +1435,13 @@ class OracleJDBC:
 
         return result.get('rows', [])
 
-    def query_one(self, sql: str) -> Optional[Dict[str, Any]]:
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[Dict[str, Any]]:
         """
         Execute SQL query and return first row only.
 
         Args:
-            sql: SQL query to execute
+            sql: SQL query to execute, optionally with ? bind placeholders
+            params: Values for the bind placeholders
 
         Returns:
             First row dictionary, or None if no results
@@ -446,7 +1449,7 @@ class OracleJDBC:
         Raises:
             RuntimeError: If query fails
         """
-        rows = self.query(sql)
+        rows = self.query(sql, params)
         return rows[0] if rows else None
 
     def test_connection(self) -> bool:
@@ -472,7 +1475,24 @@ class OracleJDBC:
         return self.pool.health_check()
 
     def shutdown(self):
-        """Shutdown connection pool and cleanup resources."""
+        """
+        Release this instance's hold on the shared connection pool.
+
+        The pool's workers are stopped once the last OracleJDBC instance
+        using it has shut down.
+        """
+        atexit.unregister(self.shutdown)
+        with _POOL_CACHE_LOCK:
+            if self._pool_released:
+                return
+            self._pool_released = True
+
+            _POOL_REFS[self._pool_key] -= 1
+            if _POOL_REFS[self._pool_key] > 0:
+                return
+            del _POOL_REFS[self._pool_key]
+            del _POOL_CACHE[self._pool_key]
+
         self.pool.shutdown()
 
 
@@ -511,6 +1531,15 @@ def main():
         row = db.query_one("SELECT USER as current_user FROM DUAL")
         print(f"Current user: {row}")
 
+        # Test pipelined batch
+        print("\nTesting execute_many...")
+        results = db.execute_many([
+            "SELECT 1 as n FROM DUAL",
+            "SELECT 2 as n FROM DUAL",
+            "SELECT 3 as n FROM DUAL",
+        ])
+        print(f"Batch results: {[r.get('rows') for r in results]}")
+
         print("\n🎉 All tests passed! Oracle JDBC connection working through StrongDM.")
 
     except Exception as e:
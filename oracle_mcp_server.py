@@ -5,14 +5,15 @@ Works through StrongDM proxy on Apple Silicon.
 """
 
 import asyncio
-import hashlib
+import atexit
+import datetime
 import json
 import logging
-import re
-import secrets
+import queue
+import threading
 import time
-from collections import deque
-from typing import Any, Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Awaitable, Callable, Optional
 from mcp.server import Server
 from mcp.types import (
     Resource,
@@ -23,370 +24,364 @@ from mcp.types import (
 )
 from oracle_jdbc import OracleJDBC
 from query_validator import QueryValidator, ValidationResult
+from guardrails import (
+    RateLimiter,
+    QueryApprovalTracker,
+    CircuitBreaker,
+    validate_identifier,
+)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# orjson serializes large result sets several times faster than the stdlib
+# json module and with far less intermediate garbage; it is optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Configure logging. Request handlers only enqueue records; a background
+# thread formats them and does the stderr writes.
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+_log_listener = QueueListener(_log_queue, _log_handler)
+_queue_handler = QueueHandler(_log_queue)
+# The listener's handler adds level and logger name; don't do it twice
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+_log_listener.start()
+# Stopping the listener flushes whatever is still queued
+atexit.register(_log_listener.stop)
 logger = logging.getLogger("oracle-mcp-server")
 
 # Create MCP server
 server = Server("oracle-jdbc-server")
 
-# Global database connection and validator
+# Global database connection and validator. The validator is cheap and
+# does no I/O, so it is built at import; the connection starts JVM workers
+# and is created on first use by init_db().
 db: OracleJDBC = None
-validator: QueryValidator = None
-
+_db_lock = threading.Lock()
+validator = QueryValidator(
+    max_complexity=50,      # Maximum complexity score
+    max_rows=10000,         # Maximum result rows
+    allow_cross_joins=False # Block cartesian products
+)
 
-class RateLimiter:
-    """Simple rate limiter to prevent DoS attacks."""
 
-    def __init__(self, max_requests: int = 60, time_window: int = 60):
-        """
-        Initialize rate limiter.
+def _json_default(value: Any) -> Any:
+    """
+    Serialize values the JSON encoders don't handle natively.
 
-        Args:
-            max_requests: Maximum requests allowed in time window
-            time_window: Time window in seconds
-        """
-        self.max_requests = max_requests
-        self.time_window = time_window
-        self.requests = deque()
+    Used by both encoders so a response looks the same whichever one
+    produced it: dates and times become ISO 8601 text (as orjson writes
+    them natively), raw bytes become hex, anything else (e.g. Decimal)
+    its str().
+    """
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
 
-    def is_allowed(self) -> tuple[bool, str]:
-        """
-        Check if a request is allowed.
 
-        Returns:
-            Tuple of (allowed, error_message)
-        """
-        now = time.time()
+def dumps_rows(response: dict) -> str:
+    """
+    Serialize a row-carrying tool response as compact JSON.
 
-        # Remove old requests outside the time window
-        while self.requests and self.requests[0] < now - self.time_window:
-            self.requests.popleft()
+    Indentation is skipped on purpose: on a 10,000 row result it is a large
+    share of the text and no help to the caller.
 
-        # Check if limit exceeded
-        if len(self.requests) >= self.max_requests:
-            return False, f"Rate limit exceeded: {self.max_requests} requests per {self.time_window} seconds"
+    Args:
+        response: Response dictionary
 
-        # Record this request
-        self.requests.append(now)
-        return True, ""
+    Returns:
+        JSON text
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(response, default=_json_default).decode()
+        except TypeError:
+            # Integers beyond 64 bits (large Oracle NUMBERs); the stdlib
+            # encoder handles them exactly
+            pass
+    return json.dumps(response, default=_json_default, ensure_ascii=False, separators=(",", ":"))
 
 
-# Global rate limiter
-rate_limiter = RateLimiter(max_requests=60, time_window=60)
+# Result layouts accepted by query_oracle's "format" argument
+ROW_FORMATS = ("rows", "columnar")
 
 
-class QueryApprovalTracker:
+def rows_to_columnar(rows: list[dict]) -> dict:
     """
-    Tracks query approvals to enforce the approval workflow.
-    Ensures queries are previewed and explicitly approved before execution.
-    """
-
-    def __init__(self, token_expiry: int = 300):
-        """
-        Initialize query approval tracker.
-
-        Args:
-            token_expiry: Token expiry time in seconds (default: 5 minutes)
-        """
-        self.token_expiry = token_expiry
-        self.approvals = {}  # {token: {query_hash, timestamp, query_preview}}
-        self.lock = asyncio.Lock()
-
-    def _hash_query(self, query: str) -> str:
-        """
-        Generate hash of query for approval tracking.
-
-        Args:
-            query: SQL query
-
-        Returns:
-            SHA256 hash of normalized query
-        """
-        # Normalize query (strip whitespace, lowercase) for consistent hashing
-        normalized = ' '.join(query.strip().lower().split())
-        return hashlib.sha256(normalized.encode()).hexdigest()
-
-    async def generate_approval_token(self, query: str) -> str:
-        """
-        Generate approval token for a query.
-
-        Args:
-            query: SQL query that needs approval
-
-        Returns:
-            Approval token (32-character hex string)
-        """
-        async with self.lock:
-            # Generate secure random token
-            token = secrets.token_hex(16)  # 32 character hex string
-
-            # Store approval with metadata
-            self.approvals[token] = {
-                'query_hash': self._hash_query(query),
-                'timestamp': time.time(),
-                'query_preview': query[:100]  # Store preview for logging
-            }
+    Convert row dictionaries to a column list plus one value list per row.
 
-            # Clean up expired tokens
-            self._cleanup_expired()
+    Column names are sent once instead of once per row, which shrinks wide
+    results considerably. The JDBC worker omits NULL columns from a row,
+    so columns are collected across all rows (in first-seen order) and
+    missing values become null.
 
-            logger.info(f"[APPROVAL] Generated token for query: {query[:50]}...")
-            return token
-
-    async def verify_approval(self, query: str, token: str) -> tuple[bool, str]:
-        """
-        Verify that query has been approved with valid token.
-
-        Args:
-            query: SQL query to execute
-            token: Approval token from preview_query
+    Args:
+        rows: Rows as returned by the database layer
 
-        Returns:
-            Tuple of (is_approved, error_message)
-        """
-        async with self.lock:
-            # Clean up expired tokens first
-            self._cleanup_expired()
+    Returns:
+        Dict with "columns" (list of names) and "data" (list of value lists)
+    """
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    return {
+        "columns": columns,
+        "data": [[row.get(column) for column in columns] for row in rows]
+    }
 
-            if not token:
-                return False, "No approval token provided. You must call preview_query first and include the approval_token in your query_oracle call."
 
-            # Check if token exists
-            if token not in self.approvals:
-                return False, "Invalid or expired approval token. Please call preview_query again to get a new approval token."
+# Global rate limiters; previews get their own budget so the
+# preview -> execute workflow doesn't count twice against query_oracle
+rate_limiter = RateLimiter(max_requests=60, time_window=60)
+preview_rate_limiter = RateLimiter(max_requests=60, time_window=60)
 
-            approval_data = self.approvals[token]
-            query_hash = self._hash_query(query)
+# Longest query text accepted. Checked before anything that scales with
+# query length (normalization, hashing, SQL parsing) runs.
+MAX_QUERY_LEN = 64 * 1024
 
-            # Verify query matches the approved query
-            if query_hash != approval_data['query_hash']:
-                logger.warning(f"[APPROVAL] Query hash mismatch for token {token}")
-                return False, "Query does not match approved query. The query you're trying to execute is different from the one you previewed."
 
-            # Token is valid - consume it (one-time use)
-            del self.approvals[token]
+# Global approval tracker
+approval_tracker = QueryApprovalTracker(token_expiry=300)  # 5 minute expiry
 
-            logger.info(f"[APPROVAL] Token verified and consumed for query: {query[:50]}...")
-            return True, ""
 
-    def _cleanup_expired(self):
-        """Remove expired approval tokens."""
-        now = time.time()
-        expired = [
-            token for token, data in self.approvals.items()
-            if now - data['timestamp'] > self.token_expiry
-        ]
+# Global circuit breaker
+circuit_breaker = CircuitBreaker(
+    failure_threshold=5,     # Open after 5 consecutive failures
+    recovery_timeout=60,     # Wait 60 seconds before testing recovery
+    success_threshold=2      # Close after 2 consecutive successes
+)
 
-        for token in expired:
-            logger.info(f"[APPROVAL] Token expired: {token}")
-            del self.approvals[token]
 
-    def get_pending_approvals(self) -> int:
-        """Get count of pending approvals."""
-        self._cleanup_expired()
-        return len(self.approvals)
+def init_db():
+    """
+    Initialize database connection.
 
+    Safe to call from any thread: only the first caller constructs the
+    connection, so there is never more than one set of JVM workers.
+    """
+    global db
+    if db is not None:
+        return
+
+    with _db_lock:
+        if db is None:
+            import os
+            # ORACLE_BACKEND=oracledb talks to the database directly through
+            # python-oracledb (thin mode); the default JDBC backend goes
+            # through JVM workers and works anywhere Java does
+            backend = os.getenv("ORACLE_BACKEND", "jdbc").lower()
+            if backend == "oracledb":
+                from oracle_native import OracleNative as backend_cls
+            elif backend == "jdbc":
+                backend_cls = OracleJDBC
+            else:
+                raise ValueError(f"Unknown ORACLE_BACKEND '{backend}' (expected 'jdbc' or 'oracledb')")
 
-# Global approval tracker
-approval_tracker = QueryApprovalTracker(token_expiry=300)  # 5 minute expiry
+            db = backend_cls(
+                host=os.getenv("ORACLE_HOST", "127.0.0.1"),
+                port=int(os.getenv("ORACLE_PORT", "10006")),
+                service_name=os.getenv("ORACLE_SERVICE_NAME", "ylvoprd"),
+                user=os.getenv("ORACLE_USER", "username"),
+                password=os.getenv("ORACLE_PASSWORD", "password"),
+                pool_size=int(os.getenv("ORACLE_POOL_SIZE", "2"))
+            )
+            logger.info(f"Database connection initialized ({backend} backend)")
 
 
-class CircuitBreaker:
-    """
-    Circuit breaker pattern to prevent hammering a failing database.
-    States: CLOSED (normal), OPEN (failing), HALF_OPEN (testing recovery)
+async def ensure_db():
     """
+    Make sure the database connection exists before a handler uses it.
 
-    def __init__(self, failure_threshold: int = 5, recovery_timeout: int = 60, success_threshold: int = 2):
-        """
-        Initialize circuit breaker.
-
-        Args:
-            failure_threshold: Number of consecutive failures to open circuit
-            recovery_timeout: Seconds to wait before attempting recovery
-            success_threshold: Number of consecutive successes to close circuit
-        """
-        self.failure_threshold = failure_threshold
-        self.recovery_timeout = recovery_timeout
-        self.success_threshold = success_threshold
-
-        # Circuit state
-        self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
-        self.failure_count = 0
-        self.success_count = 0
-        self.last_failure_time = None
-        self.lock = asyncio.Lock()
-
-    async def call(self, func, *args, **kwargs):
-        """
-        Execute function through circuit breaker.
-
-        Args:
-            func: Function to execute
-            *args: Function arguments
-            **kwargs: Function keyword arguments
-
-        Returns:
-            Function result
-
-        Raises:
-            RuntimeError: If circuit is open
-        """
-        async with self.lock:
-            # Check circuit state
-            if self.state == "OPEN":
-                # Check if recovery timeout has elapsed
-                if time.time() - self.last_failure_time >= self.recovery_timeout:
-                    logger.info("[CIRCUIT_BREAKER] Entering HALF_OPEN state for recovery attempt")
-                    self.state = "HALF_OPEN"
-                    self.success_count = 0
-                else:
-                    # Circuit is open, reject request
-                    remaining = int(self.recovery_timeout - (time.time() - self.last_failure_time))
-                    logger.warning(f"[CIRCUIT_BREAKER] Circuit OPEN - rejecting request. Retry in {remaining}s")
-                    raise RuntimeError(f"Circuit breaker is OPEN. Database appears to be down. Retry in {remaining} seconds.")
-
-        # Execute function
-        try:
-            result = func(*args, **kwargs) if not asyncio.iscoroutinefunction(func) else await func(*args, **kwargs)
-
-            # Success - update circuit state
-            async with self.lock:
-                self.failure_count = 0
+    Once the connection is up this is a single global check. The first
+    call starts the backend in a worker thread, so JVM startup never
+    blocks the event loop.
+    """
+    if db is None:
+        await asyncio.to_thread(init_db)
 
-                if self.state == "HALF_OPEN":
-                    self.success_count += 1
-                    if self.success_count >= self.success_threshold:
-                        logger.info(f"[CIRCUIT_BREAKER] Circuit CLOSED - database recovered after {self.success_count} successes")
-                        self.state = "CLOSED"
-                        self.success_count = 0
 
-            return result
+# Executions currently running, keyed by the exact query text; identical
+# queries that arrive meanwhile await the same future instead of taking
+# another connection. Not the approval hash: that folds case and whitespace,
+# including inside string literals, so 'Bob' and 'bob' would share rows.
+_inflight: dict[str, asyncio.Future] = {}
 
-        except Exception as e:
-            # Failure - update circuit state
-            async with self.lock:
-                self.failure_count += 1
-                self.last_failure_time = time.time()
-                self.success_count = 0
-
-                if self.state == "HALF_OPEN":
-                    # Recovery attempt failed
-                    logger.warning("[CIRCUIT_BREAKER] Recovery attempt failed - returning to OPEN state")
-                    self.state = "OPEN"
-                elif self.failure_count >= self.failure_threshold:
-                    # Threshold exceeded
-                    logger.error(f"[CIRCUIT_BREAKER] Circuit OPEN - {self.failure_count} consecutive failures")
-                    self.state = "OPEN"
-
-            raise
-
-    def get_state(self) -> dict:
-        """Get current circuit breaker state."""
-        return {
-            'state': self.state,
-            'failure_count': self.failure_count,
-            'success_count': self.success_count,
-            'last_failure_time': self.last_failure_time
-        }
 
+async def execute_coalesced(safe_query: str) -> dict:
+    """
+    Execute a query through the circuit breaker, sharing the result with any
+    identical query already in flight.
 
-# Global circuit breaker
-circuit_breaker = CircuitBreaker(
-    failure_threshold=5,     # Open after 5 consecutive failures
-    recovery_timeout=60,     # Wait 60 seconds before testing recovery
-    success_threshold=2      # Close after 2 consecutive successes
-)
+    Args:
+        safe_query: Validated, row-limited query to execute
 
+    Returns:
+        Query result dictionary
 
-def validate_identifier(identifier: str, max_length: int = 30) -> bool:
+    Raises:
+        RuntimeError: If circuit is open
+    """
+    pending = _inflight.get(safe_query)
+    if pending is not None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Joining in-flight execution of query: {safe_query[:50]}...")
+        # Shielded so a cancelled follower doesn't cancel everyone else
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[safe_query] = future
+    try:
+        await ensure_db()
+        result = await circuit_breaker.call_sync(db.execute, safe_query)
+    except BaseException as e:
+        future.set_exception(e)
+        # Mark retrieved; with no followers nobody else will look at it
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del _inflight[safe_query]
+
+
+# Serialized describe_table / list_tables responses, keyed by (tool, name).
+# Schema metadata changes rarely, so repeat calls within the TTL skip the DB.
+_SCHEMA_TTL = 300
+_SCHEMA_CACHE_SIZE = 256
+_schema_cache: dict[tuple[str, str], tuple[float, str]] = {}
+# Lookups answered without a database call (cached, or joined to a fetch
+# already running) vs fetches started, whether or not they succeed
+_schema_cache_stats = {"hits": 0, "misses": 0}
+# Metadata fetches currently running, keyed like _schema_cache; concurrent
+# misses for the same key share one fetch, misses for other keys don't wait
+_schema_inflight: dict[tuple[str, str], asyncio.Future] = {}
+# Bumped by refresh_metadata; a fetch that started before the bump finishes
+# with pre-refresh metadata and must not be cached
+_schema_generation = 0
+
+
+def _schema_cache_get(key: tuple[str, str]) -> Optional[str]:
     """
-    Validate database identifier (table name, schema name, etc.).
+    Look up a cached schema response.
 
     Args:
-        identifier: The identifier to validate
-        max_length: Maximum allowed length
+        key: (tool name, table or schema name)
 
     Returns:
-        True if valid, False otherwise
+        Response text, or None if absent or older than the TTL
     """
-    if not identifier:
-        return False
-
-    # Oracle identifier rules:
-    # - Must start with letter
-    # - Can contain letters, numbers, underscore, $, #
-    # - Max 30 chars (or 128 in 12.2+, but we use 30 for safety)
-    # - Case insensitive (we'll uppercase)
-    if len(identifier) > max_length:
-        return False
+    entry = _schema_cache.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[0] >= _SCHEMA_TTL:
+        del _schema_cache[key]
+        return None
+    _schema_cache_stats["hits"] += 1
+    return entry[1]
 
-    # Allow only safe characters: alphanumeric, underscore
-    # Block any SQL injection characters
-    if not re.match(r'^[A-Za-z][A-Za-z0-9_$#]*$', identifier):
-        return False
 
-    return True
+def _schema_cache_put(key: tuple[str, str], text: str, generation: int):
+    """
+    Cache a schema response, evicting the oldest entry when full.
 
+    Args:
+        key: (tool name, table or schema name)
+        text: Response text to return on later hits
+        generation: _schema_generation when the fetch started; the response
+            is dropped if refresh_metadata has run since
+    """
+    if generation != _schema_generation:
+        return
+    _schema_cache.pop(key, None)
+    if len(_schema_cache) >= _SCHEMA_CACHE_SIZE:
+        del _schema_cache[next(iter(_schema_cache))]
+    _schema_cache[key] = (time.monotonic(), text)
+
+
+async def _schema_fetch_coalesced(
+    key: tuple[str, str],
+    fetch: Callable[[], Awaitable[list[TextContent]]]
+) -> list[TextContent]:
+    """
+    Run a schema cache miss, sharing the response with any concurrent miss
+    for the same key.
 
-def init_db():
-    """Initialize database connection and query validator."""
-    global db, validator
-    if db is None:
-        import os
-        db = OracleJDBC(
-            host=os.getenv("ORACLE_HOST", "127.0.0.1"),
-            port=int(os.getenv("ORACLE_PORT", "10006")),
-            service_name=os.getenv("ORACLE_SERVICE_NAME", "ylvoprd"),
-            user=os.getenv("ORACLE_USER", "username"),
-            password=os.getenv("ORACLE_PASSWORD", "password")
-        )
-        logger.info("Database connection initialized")
+    Args:
+        key: (tool name, table or schema name)
+        fetch: Queries the database, caches the response and returns it
 
-    if validator is None:
-        validator = QueryValidator(
-            max_complexity=50,      # Maximum complexity score
-            max_rows=10000,         # Maximum result rows
-            allow_cross_joins=False # Block cartesian products
-        )
-        logger.info("Query validator initialized")
+    Returns:
+        Response from fetch, including error responses
+    """
+    pending = _schema_inflight.get(key)
+    if pending is not None:
+        _schema_cache_stats["hits"] += 1
+        # Shielded so a cancelled follower doesn't cancel everyone else
+        return await asyncio.shield(pending)
+
+    _schema_cache_stats["misses"] += 1
+    future = asyncio.get_running_loop().create_future()
+    _schema_inflight[key] = future
+    try:
+        response = await fetch()
+    except BaseException as e:
+        future.set_exception(e)
+        # Mark retrieved; with no followers nobody else will look at it
+        future.exception()
+        raise
+    else:
+        future.set_result(response)
+        return response
+    finally:
+        # refresh_metadata may have dropped this entry and a newer fetch
+        # for the same key taken its place
+        if _schema_inflight.get(key) is future:
+            del _schema_inflight[key]
+
+
+# Static resource list, built once rather than on every list_resources call
+_RESOURCES = [
+    Resource(
+        uri="oracle://connection",
+        name="Oracle Connection Status",
+        mimeType="text/plain",
+        description="Check Oracle database connection status"
+    ),
+    Resource(
+        uri="oracle://info",
+        name="Database Information",
+        mimeType="application/json",
+        description="Get Oracle database version and connection info"
+    )
+]
 
 
 @server.list_resources()
 async def list_resources() -> list[Resource]:
     """List available database resources."""
-    return [
-        Resource(
-            uri="oracle://connection",
-            name="Oracle Connection Status",
-            mimeType="text/plain",
-            description="Check Oracle database connection status"
-        ),
-        Resource(
-            uri="oracle://info",
-            name="Database Information",
-            mimeType="application/json",
-            description="Get Oracle database version and connection info"
-        )
-    ]
+    return _RESOURCES
 
 
 @server.read_resource()
 async def read_resource(uri: str) -> str:
     """Read database resource."""
-    init_db()
+    await ensure_db()
 
     if uri == "oracle://connection":
-        if db.test_connection():
+        # Off the event loop like the tools' calls; not through the breaker,
+        # so the status reflects the database rather than the circuit state
+        if await asyncio.to_thread(db.test_connection):
             return "✅ Oracle database connection is active"
         else:
             return "❌ Oracle database connection is down"
 
     elif uri == "oracle://info":
         try:
-            version = db.query_one("""
+            version = await circuit_breaker.call_sync(db.query_one, """
                 SELECT
                     banner as version,
                     USER as current_user,
@@ -403,13 +398,11 @@ async def read_resource(uri: str) -> str:
         raise ValueError(f"Unknown resource URI: {uri}")
 
 
-@server.list_tools()
-async def list_tools() -> list[Tool]:
-    """List available database tools."""
-    return [
-        Tool(
-            name="preview_query",
-            description="""Preview and validate SQL query WITHOUT executing it.
+# Static tool list, built once rather than on every list_tools call
+_TOOLS = [
+    Tool(
+        name="preview_query",
+        description="""Preview and validate SQL query WITHOUT executing it.
 
 **USE THIS FIRST** before query_oracle to show the user:
 - The query that will be executed
@@ -426,20 +419,20 @@ Returns validation results only. Does NOT execute the query.
 4. Only then call query_oracle to execute
 
 Example: preview_query with "SELECT * FROM users WHERE id = 123" """,
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "SQL query to preview and validate"
-                    }
-                },
-                "required": ["query"]
-            }
-        ),
-        Tool(
-            name="query_oracle",
-            description="""Execute SQL query on Oracle database.
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "SQL query to preview and validate"
+                }
+            },
+            "required": ["query"]
+        }
+    ),
+    Tool(
+        name="query_oracle",
+        description="""Execute SQL query on Oracle database.
 
 **CRITICAL: APPROVAL WORKFLOW REQUIRED**
 1. Call preview_query FIRST to get validation results and approval_token
@@ -462,24 +455,29 @@ Example usage:
 3. result = query_oracle(query="SELECT * FROM users WHERE id = 123", approval_token="<token>")
 
 Note: Approval tokens expire after 5 minutes and are single-use.""",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "SQL query to execute (must match the query previewed)"
-                    },
-                    "approval_token": {
-                        "type": "string",
-                        "description": "Approval token received from preview_query (required for execution)"
-                    }
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "SQL query to execute (must match the query previewed)"
                 },
-                "required": ["query", "approval_token"]
-            }
-        ),
-        Tool(
-            name="describe_table",
-            description="""Get table structure and column information.
+                "approval_token": {
+                    "type": "string",
+                    "description": "Approval token received from preview_query (required for execution)"
+                },
+                "format": {
+                    "type": "string",
+                    "enum": list(ROW_FORMATS),
+                    "description": "Result layout: 'rows' (list of objects, default) or 'columnar' (column names once, then one value list per row; smaller for wide results)"
+                }
+            },
+            "required": ["query", "approval_token"]
+        }
+    ),
+    Tool(
+        name="describe_table",
+        description="""Get table structure and column information.
 
 Returns column names, data types, nullable status, and primary keys.
 
@@ -488,20 +486,20 @@ Example:
 - table_name: "ORDERS"
 
 Note: Table names are case-sensitive (typically uppercase in Oracle).""",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {
-                        "type": "string",
-                        "description": "Name of the table to describe (case-sensitive)"
-                    }
-                },
-                "required": ["table_name"]
-            }
-        ),
-        Tool(
-            name="list_tables",
-            description="""List all accessible tables in the database.
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {
+                    "type": "string",
+                    "description": "Name of the table to describe (case-sensitive)"
+                }
+            },
+            "required": ["table_name"]
+        }
+    ),
+    Tool(
+        name="list_tables",
+        description="""List all accessible tables in the database.
 
 Returns table names with optional schema filter.
 
@@ -510,24 +508,57 @@ Example:
 - schema: null (lists tables in current user's schema)
 
 Note: Returns only tables accessible by current user.""",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "schema": {
-                        "type": "string",
-                        "description": "Schema name to filter tables (optional)"
-                    }
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "schema": {
+                    "type": "string",
+                    "description": "Schema name to filter tables (optional)"
                 }
             }
-        )
-    ]
+        }
+    ),
+    Tool(
+        name="refresh_metadata",
+        description="""Discard cached describe_table/list_tables responses.
+
+Use after schema changes (new tables, altered columns) so the next
+describe_table or list_tables call reads fresh metadata from the database.
+Cached responses otherwise expire after 5 minutes.
+
+Does not touch the database.""",
+        inputSchema={
+            "type": "object",
+            "properties": {}
+        }
+    ),
+    Tool(
+        name="get_cache_stats",
+        description="""Report server-side cache statistics.
+
+Returns hit/miss counts and hit rate for the query validation cache,
+plus hit/miss counts and size of the describe_table/list_tables cache.
+
+Does not touch the database.""",
+        inputSchema={
+            "type": "object",
+            "properties": {}
+        }
+    )
+]
+
+
+@server.list_tools()
+async def list_tools() -> list[Tool]:
+    """List available database tools."""
+    return _TOOLS
 
 
 @server.call_tool()
 async def call_tool(name: str, arguments: Any) -> list[TextContent]:
     """Execute database tool."""
-    init_db()
-
+    # The connection is set up lazily by the handlers that reach the
+    # database; previews, cache hits and rejections never wait on it
     try:
         if name == "preview_query":
             query = arguments.get("query")
@@ -537,15 +568,31 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
                     text="Error: 'query' parameter is required"
                 )]
 
+            if len(query) > MAX_QUERY_LEN:
+                logger.warning(f"[AUDIT] BLOCKED | preview_query too large: {len(query)} chars")
+                return [TextContent(
+                    type="text",
+                    text=f"Error: Query is too large ({len(query)} characters, maximum {MAX_QUERY_LEN})"
+                )]
+
+            # SECURITY: Rate limiting check, before any parsing work
+            allowed, rate_limit_error = preview_rate_limiter.is_allowed()
+            if not allowed:
+                logger.warning(f"[AUDIT] RATE_LIMIT_EXCEEDED | preview_query | {rate_limit_error}")
+                return [TextContent(
+                    type="text",
+                    text=f"Error: {rate_limit_error}. Please wait before retrying."
+                )]
+
             # Validate query for safety
             validation = validator.validate(query)
 
             # Determine if row limit would be applied
-            safe_query = validator.wrap_with_row_limit(query)
-            row_limit_applied = safe_query != query
+            safe_query, row_limit_applied = validator.apply_row_limit(query)
 
-            # Generate approval token
-            approval_token = await approval_tracker.generate_approval_token(query)
+            # Generate approval token; the validation travels with it so
+            # query_oracle can skip parsing the same query again
+            approval_token = await approval_tracker.generate_approval_token(query, (validation, safe_query, row_limit_applied))
 
             # Build preview response
             preview_response = {
@@ -583,6 +630,7 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         elif name == "query_oracle":
             query = arguments.get("query")
             approval_token = arguments.get("approval_token")
+            row_format = arguments.get("format") or "rows"
 
             if not query:
                 return [TextContent(
@@ -590,16 +638,21 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
                     text="Error: 'query' parameter is required"
                 )]
 
-            # CRITICAL: Verify approval token
-            is_approved, approval_error = await approval_tracker.verify_approval(query, approval_token)
-            if not is_approved:
-                logger.warning(f"[AUDIT] APPROVAL_DENIED | Query: {query[:50]}... | Reason: {approval_error}")
+            if row_format not in ROW_FORMATS:
                 return [TextContent(
                     type="text",
-                    text=f"Error: {approval_error}"
+                    text=f"Error: Invalid format '{row_format}'. Expected one of: {', '.join(ROW_FORMATS)}"
+                )]
+
+            if len(query) > MAX_QUERY_LEN:
+                logger.warning(f"[AUDIT] BLOCKED | query_oracle too large: {len(query)} chars")
+                return [TextContent(
+                    type="text",
+                    text=f"Error: Query is too large ({len(query)} characters, maximum {MAX_QUERY_LEN})"
                 )]
 
-            # SECURITY: Rate limiting check
+            # SECURITY: Rate limiting check, before hashing the query for the
+            # approval lookup; a rejected call leaves the token unused
             allowed, rate_limit_error = rate_limiter.is_allowed()
             if not allowed:
                 # AUDIT LOG: Rate limit exceeded
@@ -609,12 +662,27 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
                     text=f"Error: {rate_limit_error}. Please wait before retrying."
                 )]
 
-            # AUDIT LOG: Query attempt (approved)
-            logger.info(f"[AUDIT] Operation: query_oracle | APPROVED | Query length: {len(query)} chars")
-            logger.info(f"[AUDIT] Query preview: {query[:150]}...")
+            # CRITICAL: Verify approval token
+            is_approved, approval_error, validated = await approval_tracker.claim_approval(query, approval_token)
+            if not is_approved:
+                logger.warning(f"[AUDIT] APPROVAL_DENIED | Query: {query[:50]}... | Reason: {approval_error}")
+                return [TextContent(
+                    type="text",
+                    text=f"Error: {approval_error}"
+                )]
 
-            # Validate query for safety
-            validation = validator.validate(query)
+            # AUDIT LOG: Query attempt (approved)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"[AUDIT] Operation: query_oracle | APPROVED | Query length: {len(query)} chars")
+                logger.info(f"[AUDIT] Query preview: {query[:150]}...")
+
+            # Validate query for safety, reusing the preview's result when this
+            # is the exact query text that was previewed
+            if validated is not None:
+                validation, safe_query, row_limit_applied = validated
+            else:
+                validation = validator.validate(query)
+                safe_query = None
 
             if not validation.is_safe:
                 # AUDIT LOG: Query blocked
@@ -632,20 +700,21 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
                     text=json.dumps(error_response, indent=2)
                 )]
 
-            # Log warnings if any
-            if validation.warnings:
+            # Log warnings if any (skipped outright when INFO is off)
+            if validation.warnings and logger.isEnabledFor(logging.INFO):
                 for warning in validation.warnings:
                     logger.info(f"Query warning: {warning}")
 
             # Wrap query with row limit for safety
-            safe_query = validator.wrap_with_row_limit(query)
+            if safe_query is None:
+                safe_query, row_limit_applied = validator.apply_row_limit(query)
 
-            if safe_query != query:
+            if row_limit_applied:
                 logger.info(f"Query wrapped with row limit: {validator.max_rows}")
 
             # Execute query through circuit breaker
             try:
-                result = await circuit_breaker.call(db.execute, safe_query)
+                result = await execute_coalesced(safe_query)
             except RuntimeError as e:
                 # Circuit breaker is open
                 logger.error(f"[AUDIT] CIRCUIT_BREAKER_OPEN | {str(e)}")
@@ -660,22 +729,25 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
                 count = result.get('count', 0)
 
                 # AUDIT LOG: Successful execution
-                logger.info(f"[AUDIT] SUCCESS | Rows returned: {count} | Complexity: {validation.complexity_score} | Row limit applied: {safe_query != query}")
+                logger.info(f"[AUDIT] SUCCESS | Rows returned: {count} | Complexity: {validation.complexity_score} | Row limit applied: {row_limit_applied}")
 
                 response = {
                     "success": True,
-                    "row_count": count,
-                    "rows": rows,
-                    "validation": {
-                        "complexity_score": validation.complexity_score,
-                        "warnings": validation.warnings if validation.warnings else [],
-                        "row_limit_applied": validator.max_rows if safe_query != query else None
-                    }
+                    "row_count": count
+                }
+                if row_format == "columnar":
+                    response.update(rows_to_columnar(rows))
+                else:
+                    response["rows"] = rows
+                response["validation"] = {
+                    "complexity_score": validation.complexity_score,
+                    "warnings": validation.warnings if validation.warnings else [],
+                    "row_limit_applied": validator.max_rows if row_limit_applied else None
                 }
 
                 return [TextContent(
                     type="text",
-                    text=json.dumps(response, indent=2, default=str)
+                    text=dumps_rows(response)
                 )]
             else:
                 error = result.get('error', 'Unknown error')
@@ -697,8 +769,10 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
             # AUDIT LOG: describe_table attempt
             logger.info(f"[AUDIT] Operation: describe_table | Table: {table_name}")
 
-            # Validate table name to prevent SQL injection
-            if not validate_identifier(table_name):
+            # Validate table name to prevent SQL injection; the validated name
+            # comes back upper-cased, as Oracle stores it
+            safe_table_name = validate_identifier(table_name)
+            if safe_table_name is None:
                 # AUDIT LOG: Invalid table name
                 logger.warning(f"[AUDIT] BLOCKED | Invalid table name: {table_name}")
                 return [TextContent(
@@ -706,64 +780,68 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
                     text=f"Error: Invalid table name '{table_name}'. Table names must start with a letter and contain only alphanumeric characters, underscores, $, or #."
                 )]
 
-            # Use uppercase for Oracle (case-insensitive but stored as uppercase)
-            safe_table_name = table_name.upper()
+            cache_key = ("describe_table", safe_table_name)
+            cached = _schema_cache_get(cache_key)
+            if cached is not None:
+                logger.info(f"[AUDIT] SUCCESS | describe_table: {safe_table_name} | cached")
+                return [TextContent(type="text", text=cached)]
 
-            # Get table structure - using bind variables would be ideal but Oracle system tables
-            # don't support them, so we use validated identifiers instead
-            query = f"""
-                SELECT
-                    column_name,
-                    data_type,
-                    data_length,
-                    nullable,
-                    data_default
-                FROM user_tab_columns
-                WHERE table_name = '{safe_table_name}'
-                ORDER BY column_id
-            """
+            async def fetch_columns() -> list[TextContent]:
+                generation = _schema_generation
+                await ensure_db()
 
-            try:
-                columns = await circuit_breaker.call(db.query, query)
-            except RuntimeError as e:
-                logger.error(f"[AUDIT] CIRCUIT_BREAKER_OPEN | describe_table: {safe_table_name}")
-                return [TextContent(
-                    type="text",
-                    text=f"Error: {str(e)}"
-                )]
+                # Columns and primary key membership in one round trip. The name
+                # is bound rather than interpolated so every table shares one
+                # prepared statement and one cursor
+                query = """
+                    SELECT
+                        c.column_name,
+                        c.data_type,
+                        c.data_length,
+                        c.nullable,
+                        c.data_default,
+                        CASE WHEN pk.column_name IS NOT NULL THEN 'Y' END AS is_pk
+                    FROM user_tab_columns c
+                    LEFT JOIN (
+                        SELECT cc.column_name
+                        FROM user_constraints uc
+                        JOIN user_cons_columns cc ON cc.constraint_name = uc.constraint_name
+                        WHERE uc.table_name = ?
+                        AND uc.constraint_type = 'P'
+                    ) pk ON pk.column_name = c.column_name
+                    WHERE c.table_name = ?
+                    ORDER BY c.column_id
+                """
 
-            # Get primary key info
-            pk_query = f"""
-                SELECT column_name
-                FROM user_cons_columns
-                WHERE constraint_name = (
-                    SELECT constraint_name
-                    FROM user_constraints
-                    WHERE table_name = '{safe_table_name}'
-                    AND constraint_type = 'P'
-                )
-            """
+                try:
+                    columns = await circuit_breaker.call_sync(db.query, query, (safe_table_name, safe_table_name))
+                except RuntimeError as e:
+                    logger.error(f"[AUDIT] CIRCUIT_BREAKER_OPEN | describe_table: {safe_table_name}")
+                    return [TextContent(
+                        type="text",
+                        text=f"Error: {str(e)}"
+                    )]
 
-            try:
-                pk_result = await circuit_breaker.call(db.query, pk_query)
-                pk_columns = [row['COLUMN_NAME'] for row in pk_result]
-            except RuntimeError as e:
-                logger.error(f"[AUDIT] CIRCUIT_BREAKER_OPEN | get primary keys: {safe_table_name}")
-                pk_columns = []  # Continue without PK info if circuit is open
+                # Split the PK flag back out so the response shape is unchanged
+                pk_columns = [row['COLUMN_NAME'] for row in columns if row.pop('IS_PK', None) == 'Y']
 
-            # AUDIT LOG: Successful describe_table
-            logger.info(f"[AUDIT] SUCCESS | describe_table: {safe_table_name} | Columns: {len(columns)} | PKs: {len(pk_columns)}")
+                # AUDIT LOG: Successful describe_table
+                logger.info(f"[AUDIT] SUCCESS | describe_table: {safe_table_name} | Columns: {len(columns)} | PKs: {len(pk_columns)}")
 
-            response = {
-                "table_name": safe_table_name,
-                "columns": columns,
-                "primary_keys": pk_columns
-            }
+                response = {
+                    "table_name": safe_table_name,
+                    "columns": columns,
+                    "primary_keys": pk_columns
+                }
+                text = dumps_rows(response)
+                _schema_cache_put(cache_key, text, generation)
 
-            return [TextContent(
-                type="text",
-                text=json.dumps(response, indent=2, default=str)
-            )]
+                return [TextContent(
+                    type="text",
+                    text=text
+                )]
+
+            return await _schema_fetch_coalesced(cache_key, fetch_columns)
 
         elif name == "list_tables":
             schema = arguments.get("schema")
@@ -773,7 +851,8 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
 
             if schema:
                 # Validate schema name to prevent SQL injection
-                if not validate_identifier(schema):
+                safe_schema = validate_identifier(schema)
+                if safe_schema is None:
                     # AUDIT LOG: Invalid schema name
                     logger.warning(f"[AUDIT] BLOCKED | Invalid schema name: {schema}")
                     return [TextContent(
@@ -781,41 +860,89 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
                         text=f"Error: Invalid schema name '{schema}'. Schema names must start with a letter and contain only alphanumeric characters, underscores, $, or #."
                     )]
 
-                safe_schema = schema.upper()
-                query = f"""
+                query = """
                     SELECT table_name, owner
                     FROM all_tables
-                    WHERE owner = '{safe_schema}'
+                    WHERE owner = ?
                     ORDER BY table_name
                 """
+                params = (safe_schema,)
             else:
                 query = """
                     SELECT table_name, 'USER' as owner
                     FROM user_tables
                     ORDER BY table_name
                 """
+                params = ()
+                safe_schema = ""
+
+            cache_key = ("list_tables", safe_schema)
+            cached = _schema_cache_get(cache_key)
+            if cached is not None:
+                logger.info(f"[AUDIT] SUCCESS | list_tables | Schema: {safe_schema or 'current_user'} | cached")
+                return [TextContent(type="text", text=cached)]
+
+            async def fetch_tables() -> list[TextContent]:
+                generation = _schema_generation
+                await ensure_db()
+
+                try:
+                    tables = await circuit_breaker.call_sync(db.query, query, params)
+                except RuntimeError as e:
+                    logger.error(f"[AUDIT] CIRCUIT_BREAKER_OPEN | list_tables: {schema if schema else 'current_user'}")
+                    return [TextContent(
+                        type="text",
+                        text=f"Error: {str(e)}"
+                    )]
+
+                # AUDIT LOG: Successful list_tables
+                logger.info(f"[AUDIT] SUCCESS | list_tables | Schema: {safe_schema or 'current_user'} | Tables found: {len(tables)}")
+
+                response = {
+                    "schema": safe_schema or "current_user",
+                    "table_count": len(tables),
+                    "tables": tables
+                }
+                text = dumps_rows(response)
+                _schema_cache_put(cache_key, text, generation)
 
-            try:
-                tables = await circuit_breaker.call(db.query, query)
-            except RuntimeError as e:
-                logger.error(f"[AUDIT] CIRCUIT_BREAKER_OPEN | list_tables: {schema if schema else 'current_user'}")
                 return [TextContent(
                     type="text",
-                    text=f"Error: {str(e)}"
+                    text=text
                 )]
 
-            # AUDIT LOG: Successful list_tables
-            logger.info(f"[AUDIT] SUCCESS | list_tables | Schema: {schema.upper() if schema else 'current_user'} | Tables found: {len(tables)}")
+            return await _schema_fetch_coalesced(cache_key, fetch_tables)
+
+        elif name == "refresh_metadata":
+            global _schema_generation
+            cleared = len(_schema_cache)
+            _schema_cache.clear()
+            # Fetches already running return pre-refresh metadata: keep them
+            # out of the cache, and make later callers start fresh fetches
+            _schema_generation += 1
+            _schema_inflight.clear()
+            logger.info(f"[AUDIT] refresh_metadata | Cleared {cleared} cached schema responses")
+            return [TextContent(
+                type="text",
+                text=json.dumps({"success": True, "cleared": cleared}, indent=2)
+            )]
 
+        elif name == "get_cache_stats":
+            schema_lookups = _schema_cache_stats["hits"] + _schema_cache_stats["misses"]
             response = {
-                "schema": schema.upper() if schema else "current_user",
-                "table_count": len(tables),
-                "tables": tables
+                "validation": validator.get_cache_stats(),
+                "schema": {
+                    "hits": _schema_cache_stats["hits"],
+                    "misses": _schema_cache_stats["misses"],
+                    "size": len(_schema_cache),
+                    "maxsize": _SCHEMA_CACHE_SIZE,
+                    "ttl_seconds": _SCHEMA_TTL,
+                    "hit_rate": round(_schema_cache_stats["hits"] / schema_lookups, 4) if schema_lookups else 0.0
+                }
             }
-
             return [TextContent(
                 type="text",
-                text=json.dumps(response, indent=2, default=str)
+                text=json.dumps(response, indent=2)
             )]
 
         else:
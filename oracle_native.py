@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Oracle database connection using python-oracledb in thin mode.
+Alternative to the JDBC backend for hosts that can reach the database
+directly; no JVM workers or JSON bridge are involved.
+"""
+
+import atexit
+import functools
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import oracledb
+except ImportError:  # pragma: no cover - only needed for ORACLE_BACKEND=oracledb
+    oracledb = None
+
+logger = logging.getLogger(__name__)
+
+# Per-call timeout, matching the JDBC worker's statement timeout
+_CALL_TIMEOUT_MS = 5000
+
+# String literals and quoted identifiers, or a ? placeholder outside them
+_BIND_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|\"[^\"]*\"|\?")
+
+
+@functools.lru_cache(maxsize=256)
+def _to_numbered_binds(sql: str) -> str:
+    """
+    Rewrite JDBC-style ? placeholders as Oracle :1, :2, ... binds.
+
+    Placeholders inside string literals and quoted identifiers are left
+    alone.
+
+    Args:
+        sql: SQL text with ? placeholders
+
+    Returns:
+        SQL text with numbered binds
+    """
+    counter = 0
+
+    def replace(match: "re.Match[str]") -> str:
+        nonlocal counter
+        if match.group() != '?':
+            return match.group()
+        counter += 1
+        return f":{counter}"
+
+    return _BIND_TOKEN_RE.sub(replace, sql)
+
+
+class OracleNative:
+    """Oracle database connection using a python-oracledb session pool.
+
+    Exposes the same methods and result shapes as OracleJDBC, so the
+    server can use either backend.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 10006,
+        service_name: str = "ylvoprd",
+        user: str = "username",
+        password: str = "password",
+        pool_size: int = 2
+    ):
+        """
+        Initialize the session pool.
+
+        Args:
+            host: Database host (default: 127.0.0.1 for StrongDM)
+            port: Database port (default: 10006 for StrongDM)
+            service_name: Oracle service name
+            user: Database user
+            password: Database password
+            pool_size: Maximum pooled sessions (default: 2)
+
+        Raises:
+            ImportError: If python-oracledb is not installed
+        """
+        if oracledb is None:
+            raise ImportError(
+                "ORACLE_BACKEND=oracledb requires python-oracledb (pip install oracledb)"
+            )
+        if pool_size < 1:
+            raise ValueError(f"pool_size must be at least 1, got {pool_size}")
+
+        # LOBs come back as str/bytes rather than locator objects
+        oracledb.defaults.fetch_lobs = False
+
+        self.dsn = f"{host}:{port}/{service_name}"
+        self.user = user
+        self.max_connections = pool_size
+        self.pool = oracledb.create_pool(
+            user=user,
+            password=password,
+            dsn=self.dsn,
+            min=1,
+            max=pool_size,
+            increment=1,
+            getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+            wait_timeout=_CALL_TIMEOUT_MS
+        )
+        self._closed = False
+
+        atexit.register(self.shutdown)
+
+        logger.info(f"OracleNative initialized with session pooling (max {pool_size} connections)")
+
+    def _run(self, sql: str, params: Sequence[Any] = ()) -> Dict[str, Any]:
+        """Execute one statement on a pooled session and build the result dict."""
+        try:
+            with self.pool.acquire() as conn:
+                conn.call_timeout = _CALL_TIMEOUT_MS
+                with conn.cursor() as cursor:
+                    # Same batch size as the JDBC workers' fetch size
+                    cursor.prefetchrows = 1000
+                    cursor.arraysize = 1000
+                    cursor.execute(sql, list(params))
+                    columns = [col[0] for col in cursor.description]
+                    rows = [dict(zip(columns, row)) for row in cursor]
+        except oracledb.Error as e:
+            return {'success': False, 'error': f"Database error: {e}"}
+
+        return {'success': True, 'rows': rows, 'count': len(rows)}
+
+    def execute(self, query: str) -> Dict[str, Any]:
+        """
+        Execute SQL query using the session pool and return results.
+
+        Args:
+            query: SQL query to execute
+
+        Returns:
+            Dictionary with structure:
+            {
+                'success': bool,
+                'rows': List[Dict[str, Any]],
+                'count': int,
+                'error': str (only if success=False)
+            }
+        """
+        return self._run(query)
+
+    def execute_many(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Execute several SQL queries in order.
+
+        Args:
+            queries: SQL queries to execute
+
+        Returns:
+            List of result dictionaries (same structure as execute())
+        """
+        return [self._run(query) for query in queries]
+
+    def execute_prepared(self, sql: str, params: Sequence[Any] = ()) -> Dict[str, Any]:
+        """
+        Execute SQL with bind values.
+
+        python-oracledb keeps a statement cache per session, so repeated
+        SQL text skips the parse step without explicit handles.
+
+        Args:
+            sql: SQL query, optionally with ? bind placeholders
+            params: Values for the bind placeholders
+
+        Returns:
+            Same structure as execute()
+        """
+        return self._run(_to_numbered_binds(sql), params)
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        """
+        Execute SQL query and return rows only.
+
+        Args:
+            sql: SQL query to execute, optionally with ? bind placeholders
+            params: Values for the bind placeholders
+
+        Returns:
+            List of row dictionaries
+
+        Raises:
+            RuntimeError: If query fails
+        """
+        result = self.execute_prepared(sql, params)
+
+        if not result.get('success'):
+            error_msg = result.get('error', 'Unknown error')
+            raise RuntimeError(f"Query failed: {error_msg}")
+
+        return result.get('rows', [])
+
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[Dict[str, Any]]:
+        """
+        Execute SQL query and return first row only.
+
+        Args:
+            sql: SQL query to execute, optionally with ? bind placeholders
+            params: Values for the bind placeholders
+
+        Returns:
+            First row dictionary, or None if no results
+
+        Raises:
+            RuntimeError: If query fails
+        """
+        rows = self.query(sql, params)
+        return rows[0] if rows else None
+
+    def test_connection(self) -> bool:
+        """
+        Test database connection using the session pool.
+
+        Returns:
+            True if connection successful, False otherwise
+        """
+        try:
+            result = self.query_one("SELECT 'OK' as status FROM DUAL")
+            return result is not None and result.get('STATUS') == 'OK'
+        except Exception:
+            return False
+
+    def pool_health(self) -> Dict[str, Any]:
+        """
+        Get session pool status.
+
+        Returns:
+            Dictionary with pool health information
+        """
+        return {
+            'total_connections': self.pool.opened,
+            'busy': self.pool.busy,
+            'max_connections': self.max_connections
+        }
+
+    def shutdown(self):
+        """Close the session pool."""
+        atexit.unregister(self.shutdown)
+        if self._closed:
+            return
+        self._closed = True
+        self.pool.close(force=True)
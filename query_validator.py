@@ -4,13 +4,93 @@ Query validator for Oracle MCP Server.
 Prevents dangerous queries like cross joins, cartesian products, and expensive operations.
 """
 
+import functools
 import re
 from typing import Tuple, List, Optional
 from dataclasses import dataclass
 from collections import Counter
 
-
-@dataclass
+try:
+    import sqlglot
+    from sqlglot import exp
+except ImportError:  # pragma: no cover - regex metrics are used instead
+    sqlglot = None
+
+
+# Patterns used on every validate() call, compiled once at import. Apart
+# from the comment strippers they run against the upper-cased query.
+_SL_COMMENT_RE = re.compile(r'--[^\n]*')
+_ML_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_SELECT_OR_WITH_RE = re.compile(r'^\s*(SELECT|WITH)\b')
+_JOIN_ON_RE = re.compile(r'\bJOIN\b.*\bON\b')
+_SELECT_STAR_RE = re.compile(r'\bSELECT\s+\*')
+# Pattern: ( ... SELECT ... ) indicates a subquery
+_SUBQUERY_RE = re.compile(r'\(\s*SELECT\s+')
+_CTE_RE = re.compile(r'\bWITH\s+\w+\s+AS\s*\(')
+# Window functions; alternatives never overlap, so one findall counts them all
+_WINDOW_FUNCTION_RE = re.compile('|'.join([
+    r'\bROW_NUMBER\s*\(',
+    r'\bRANK\s*\(',
+    r'\bDENSE_RANK\s*\(',
+    r'\bNTILE\s*\(',
+    r'\bLAG\s*\(',
+    r'\bLEAD\s*\(',
+    r'\bFIRST_VALUE\s*\(',
+    r'\bLAST_VALUE\s*\(',
+    r'\bPERCENT_RANK\s*\(',
+    r'\bCUME_DIST\s*\(',
+]))
+# Pattern: (FROM|JOIN) table_name [AS] alias
+_TABLE_REF_RE = re.compile(r'(?:FROM|JOIN)\s+([A-Z_][A-Z0-9_]*)\s+(?:AS\s+)?[A-Z_][A-Z0-9_]*')
+_LEADING_WILDCARD_RE = re.compile(r"LIKE\s+['\"]%")
+_OR_RE = re.compile(r'\bOR\b')
+# Aggregate functions and GROUP BY; one finditer pass yields the kinds used
+_AGGREGATE_RE = re.compile(r'\b(?:COUNT|SUM|AVG|MAX|MIN|GROUP(?=\s+BY\b))\b')
+# FROM-clause scanning: tokens are words and parentheses, so a single
+# linear pass can track nesting depth (no backtracking on long queries)
+_FROM_RE = re.compile(r'\bFROM\b')
+_CLAUSE_TOKEN_RE = re.compile(r'[A-Z_][A-Z0-9_$#]*|[()]')
+_FROM_TERMINATORS = frozenset({'WHERE', 'GROUP', 'ORDER', 'HAVING'})
+_JOIN_RE = re.compile(r'\bJOIN\b')
+_WHERE_RE = re.compile(r'\bWHERE\b')
+# Top-level SELECT clauses after which "WHERE/AND ROWNUM <= n" can simply
+# be appended (the outermost WHERE is then the query's last clause)
+_INLINE_LIMIT_CLAUSES = frozenset({
+    'expressions', 'from', 'from_', 'joins', 'with', 'with_', 'hint', 'where'
+})
+# Analytic function call; ROWNUM applied inline would filter its input rows
+_WINDOW_RE = re.compile(r'\bOVER\s*\(')
+_ROWNUM_COMPARE_RE = re.compile(r'\bROWNUM\s*[<>=]+\s*\d+')
+_WHERE_ROWNUM_RE = re.compile(r'WHERE\s+ROWNUM\s*<=')
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_select(sql: str) -> Optional["exp.Select"]:
+    """
+    Parse a single SELECT statement with sqlglot, memoized.
+
+    preview_query validates a query and then places its row limit, so the
+    same text is parsed twice in a row; the second parse is a cache hit.
+    The returned tree is shared between callers and must not be modified.
+
+    Args:
+        sql: Stripped SQL text
+
+    Returns:
+        The parsed Select, or None if sqlglot is not installed, the text
+        does not parse, or it is not a single SELECT (multiple statements
+        parse as a Block)
+    """
+    if sqlglot is None:
+        return None
+    try:
+        tree = sqlglot.parse_one(sql, read="oracle")
+    except sqlglot.errors.SqlglotError:
+        return None
+    return tree if isinstance(tree, exp.Select) else None
+
+
+@dataclass(slots=True)
 class ValidationResult:
     """Result of query validation."""
     is_safe: bool
@@ -23,6 +103,24 @@ class ValidationResult:
             self.warnings = []
 
 
+@dataclass(slots=True)
+class _QueryMetrics:
+    """Structural facts about a query that feed the complexity score."""
+    comma_joins: int = 0
+    table_count: int = 1
+    multi_table_no_where: bool = False
+    unconditioned_join: bool = False
+    star_over_join: bool = False
+    subquery_count: int = 0
+    cte_count: int = 0
+    window_function_count: int = 0
+    self_joins: int = 0
+    leading_wildcards: int = 0
+    or_count: int = 0
+    has_distinct: bool = False
+    aggregate_count: int = 0
+
+
 class QueryValidator:
     """Validates SQL queries for safety before execution."""
 
@@ -32,6 +130,9 @@ class QueryValidator:
     # Maximum result rows (will be enforced via ROWNUM)
     MAX_RESULT_ROWS = 10000
 
+    # Distinct query texts whose validation results are memoized
+    VALIDATION_CACHE_SIZE = 1024
+
     # Dangerous keywords that require special attention
     DANGEROUS_PATTERNS = [
         r'\bCROSS\s+JOIN\b',  # Explicit cross joins
@@ -57,6 +158,14 @@ class QueryValidator:
         r'\bUNION\b',        # Block UNION for data exfiltration
     ]
 
+    # Each list compiled into one alternation, so a query is scanned once
+    # per list; the error reports whichever keyword occurs first. This is
+    # already a single pass; a word-set lookup over re.findall(r'\w+') was
+    # measured slower, and a native multi-pattern engine isn't worth a
+    # dependency for two scans of a query capped at MAX_QUERY_LEN.
+    _DANGEROUS_RE = re.compile('|'.join(DANGEROUS_PATTERNS))
+    _BLOCKED_RE = re.compile('|'.join(BLOCKED_KEYWORDS))
+
     def __init__(
         self,
         max_complexity: int = MAX_COMPLEXITY_SCORE,
@@ -74,6 +183,10 @@ class QueryValidator:
         self.max_complexity = max_complexity
         self.max_rows = max_rows
         self.allow_cross_joins = allow_cross_joins
+        # Per instance, since results depend on the limits above
+        self._validate_cached = functools.lru_cache(
+            maxsize=self.VALIDATION_CACHE_SIZE
+        )(self._validate)
 
     def _strip_sql_comments(self, query: str) -> str:
         """
@@ -86,10 +199,10 @@ class QueryValidator:
             Query with comments removed
         """
         # Remove single-line comments (-- ...)
-        query = re.sub(r'--[^\n]*', '', query)
+        query = _SL_COMMENT_RE.sub('', query)
 
         # Remove multi-line comments (/* ... */)
-        query = re.sub(r'/\*.*?\*/', '', query, flags=re.DOTALL)
+        query = _ML_COMMENT_RE.sub('', query)
 
         return query
 
@@ -97,6 +210,65 @@ class QueryValidator:
         """
         Validate a SQL query for safety.
 
+        Results are memoized by query text; repeated queries skip parsing
+        and scoring entirely.
+
+        Args:
+            query: SQL query to validate
+
+        Returns:
+            ValidationResult with safety assessment
+        """
+        result = self._validate_cached(query)
+        # Copy so callers can't alter the cached warnings list. Built field
+        # by field: dataclasses.replace() re-inspects the fields on every
+        # call and costs more than the rest of a cache hit
+        return ValidationResult(
+            result.is_safe,
+            result.error_message,
+            list(result.warnings),
+            result.complexity_score
+        )
+
+    def validate_many(self, queries: List[str]) -> List[ValidationResult]:
+        """
+        Validate several SQL queries.
+
+        Each distinct query text is validated once; duplicates in the batch
+        share a result.
+
+        Args:
+            queries: SQL queries to validate
+
+        Returns:
+            ValidationResults in the same order as queries
+        """
+        results = {query: None for query in queries}
+        for query in results:
+            results[query] = self.validate(query)
+        return [results[query] for query in queries]
+
+    def get_cache_stats(self) -> dict:
+        """
+        Report hit/miss counts for the validation cache.
+
+        Returns:
+            Dict with hits, misses, size, maxsize and hit_rate
+        """
+        info = self._validate_cached.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _validate(self, query: str) -> ValidationResult:
+        """
+        Validate a SQL query for safety (uncached).
+
         Args:
             query: SQL query to validate
 
@@ -110,15 +282,16 @@ class QueryValidator:
         complexity_score = 0
 
         # 1. Check for blocked keywords (write operations)
-        for pattern in self.BLOCKED_KEYWORDS:
-            if re.search(pattern, query_upper):
-                return ValidationResult(
-                    is_safe=False,
-                    error_message=f"Blocked operation detected: {pattern}. Only SELECT queries are allowed."
-                )
+        blocked = self._BLOCKED_RE.search(query_upper)
+        if blocked:
+            keyword = ' '.join(blocked.group(0).split())
+            return ValidationResult(
+                is_safe=False,
+                error_message=f"Blocked operation detected: {keyword}. Only SELECT queries are allowed."
+            )
 
         # 2. Must be a SELECT query or CTE (WITH clause)
-        if not re.match(r'^\s*(SELECT|WITH)\b', query_upper):
+        if not _SELECT_OR_WITH_RE.match(query_upper):
             return ValidationResult(
                 is_safe=False,
                 error_message="Only SELECT queries (including CTEs with WITH clause) are allowed."
@@ -126,27 +299,38 @@ class QueryValidator:
 
         # 3. Check for dangerous patterns
         if not self.allow_cross_joins:
-            for pattern in self.DANGEROUS_PATTERNS:
-                if re.search(pattern, query_upper):
-                    return ValidationResult(
-                        is_safe=False,
-                        error_message=f"Dangerous pattern detected: {pattern}. Cross joins and cartesian products are not allowed."
-                    )
+            dangerous = self._DANGEROUS_RE.search(query_upper)
+            if dangerous:
+                pattern = ' '.join(dangerous.group(0).split())
+                return ValidationResult(
+                    is_safe=False,
+                    error_message=f"Dangerous pattern detected: {pattern}. Cross joins and cartesian products are not allowed."
+                )
+
+        # Collect structural metrics from the parsed query (regex fallback
+        # when sqlglot is unavailable or cannot parse the statement)
+        metrics = self._collect_metrics(query, query_upper)
 
         # 4. Detect implicit cartesian products (multiple tables without JOIN keyword)
-        complexity_score += self._check_implicit_cartesian(query_upper, warnings)
+        if metrics.comma_joins > 0:
+            # This is comma-separated table syntax (old-style join)
+            complexity_score += metrics.comma_joins * 20  # Heavy penalty
+            warnings.append(
+                f"Detected {metrics.comma_joins + 1} comma-separated tables in FROM clause. "
+                "This can create cartesian products. Use explicit JOIN syntax."
+            )
 
         # 5. Count tables in FROM clause
-        table_count = self._count_tables(query_upper)
+        table_count = metrics.table_count
         complexity_score += table_count * 5
 
         if table_count > 1:
             warnings.append(f"Query involves {table_count} tables. Ensure proper JOIN conditions exist.")
 
         # 6. Check for missing WHERE clause on multi-table queries
-        if table_count > 1 and not self._has_where_clause(query_upper):
-            # Check if it's using explicit JOINs (which have ON conditions)
-            if not re.search(r'\bJOIN\b.*\bON\b', query_upper):
+        if metrics.multi_table_no_where:
+            # Explicit JOINs carry their own ON/USING conditions
+            if metrics.unconditioned_join:
                 return ValidationResult(
                     is_safe=False,
                     error_message="Multi-table query without WHERE clause or JOIN ON conditions detected. This could create a cartesian product."
@@ -154,16 +338,12 @@ class QueryValidator:
             warnings.append("Multi-table query without WHERE clause. Ensure JOIN conditions are sufficient.")
 
         # 7. Check for SELECT * with multiple tables
-        if table_count > 1 and re.search(r'\bSELECT\s+\*', query_upper):
+        if metrics.star_over_join:
             complexity_score += 10
             warnings.append("SELECT * with multiple tables can be expensive. Consider specifying columns.")
 
-        # 8. Look for subqueries (more accurately - find SELECT within parentheses)
-        # Pattern: ( ... SELECT ... ) indicates a subquery
-        # This is better than counting all SELECT keywords which can appear in strings/comments
-        subquery_pattern = r'\(\s*SELECT\s+'
-        subquery_matches = re.findall(subquery_pattern, query_upper)
-        subquery_count = len(subquery_matches)
+        # 8. Look for subqueries
+        subquery_count = metrics.subquery_count
         if subquery_count > 0:
             complexity_score += subquery_count * 10
             warnings.append(f"Query contains {subquery_count} subquery(ies). Monitor performance.")
@@ -175,73 +355,43 @@ class QueryValidator:
                 warnings.append(f"Deep nesting detected ({subquery_count} subqueries). This can significantly impact performance.")
 
         # 9. Check for CTEs (WITH clauses)
-        cte_pattern = r'\bWITH\s+\w+\s+AS\s*\('
-        cte_matches = re.findall(cte_pattern, query_upper)
-        cte_count = len(cte_matches)
+        cte_count = metrics.cte_count
         if cte_count > 0:
             complexity_score += cte_count * 8
             warnings.append(f"Query contains {cte_count} CTE(s) (WITH clause). CTEs can be expensive if not materialized.")
 
         # 10. Check for window functions
-        window_functions = [
-            r'\bROW_NUMBER\s*\(',
-            r'\bRANK\s*\(',
-            r'\bDENSE_RANK\s*\(',
-            r'\bNTILE\s*\(',
-            r'\bLAG\s*\(',
-            r'\bLEAD\s*\(',
-            r'\bFIRST_VALUE\s*\(',
-            r'\bLAST_VALUE\s*\(',
-            r'\bPERCENT_RANK\s*\(',
-            r'\bCUME_DIST\s*\(',
-        ]
-        window_function_count = 0
-        for pattern in window_functions:
-            window_function_count += len(re.findall(pattern, query_upper))
-
+        window_function_count = metrics.window_function_count
         if window_function_count > 0:
             complexity_score += window_function_count * 12
             warnings.append(f"Query contains {window_function_count} window function(s). Window functions can be very expensive on large datasets.")
 
         # 11. Check for self-joins (same table appears multiple times)
-        # Look for table names after FROM or JOIN keywords
-        # Pattern: (FROM|JOIN) table_name [AS] alias
-        table_pattern = r'(?:FROM|JOIN)\s+([A-Z_][A-Z0-9_]*)\s+(?:AS\s+)?[A-Z_][A-Z0-9_]*'
-        table_references = re.findall(table_pattern, query_upper)
-        if table_references:
-            # Count duplicate table names (self-joins)
-            table_counts = Counter(table_references)
-            self_joins = sum(1 for table, count in table_counts.items() if count > 1)
-            if self_joins > 0:
-                complexity_score += self_joins * 15
-                warnings.append(f"Query contains {self_joins} self-join(s). Self-joins can create large intermediate result sets.")
+        self_joins = metrics.self_joins
+        if self_joins > 0:
+            complexity_score += self_joins * 15
+            warnings.append(f"Query contains {self_joins} self-join(s). Self-joins can create large intermediate result sets.")
 
         # 12. Check for LIKE with leading wildcard (very expensive)
-        leading_wildcard_pattern = r"LIKE\s+['\"]%"
-        leading_wildcard_matches = re.findall(leading_wildcard_pattern, query_upper)
-        if leading_wildcard_matches:
-            leading_wildcard_count = len(leading_wildcard_matches)
+        leading_wildcard_count = metrics.leading_wildcards
+        if leading_wildcard_count > 0:
             complexity_score += leading_wildcard_count * 10
             warnings.append(f"Query contains {leading_wildcard_count} LIKE pattern(s) with leading wildcard ('%...'). This prevents index usage and causes full table scans.")
 
         # 13. Check for OR conditions (can prevent index usage)
-        or_pattern = r'\bOR\b'
-        or_matches = re.findall(or_pattern, query_upper)
-        or_count = len(or_matches)
+        or_count = metrics.or_count
         if or_count > 2:  # More than 2 ORs is concerning
             complexity_score += (or_count - 2) * 4
             warnings.append(f"Query contains {or_count} OR condition(s). Multiple ORs can prevent index usage and degrade performance.")
 
         # 14. Check for DISTINCT
-        if 'DISTINCT' in query_upper:
+        if metrics.has_distinct:
             complexity_score += 5
             warnings.append("DISTINCT can be expensive on large result sets.")
 
         # 15. Check for aggregate functions
-        aggregates = ['COUNT', 'SUM', 'AVG', 'MAX', 'MIN', 'GROUP BY']
-        aggregate_count = sum(1 for agg in aggregates if agg in query_upper)
-        if aggregate_count > 0:
-            complexity_score += aggregate_count * 3
+        if metrics.aggregate_count > 0:
+            complexity_score += metrics.aggregate_count * 3
 
         # 16. Verify complexity score
         if complexity_score > self.max_complexity:
@@ -259,36 +409,196 @@ class QueryValidator:
             complexity_score=complexity_score
         )
 
-    def _check_implicit_cartesian(self, query_upper: str, warnings: List[str]) -> int:
+    def _collect_metrics(self, query: str, query_upper: str) -> _QueryMetrics:
+        """
+        Gather the structural metrics used for complexity scoring.
+
+        The query is parsed once with sqlglot and the AST walked once for
+        all metrics. Queries sqlglot cannot parse (or any query when sqlglot is
+        not installed) fall back to the regex approximation.
+
+        Args:
+            query: Comment-stripped SQL query
+            query_upper: Upper-cased form of the same query
+
+        Returns:
+            _QueryMetrics for the query
+        """
+        tree = _parse_select(query.strip())
+        if tree is not None:
+            return self._ast_metrics(tree)
+        return self._regex_metrics(query_upper)
+
+    def _ast_metrics(self, tree: "exp.Select") -> _QueryMetrics:
         """
-        Check for implicit cartesian products (comma-separated tables in FROM).
+        Collect metrics from a parsed SELECT statement.
+
+        Args:
+            tree: Root of the parsed query
 
         Returns:
-            Complexity score penalty
+            _QueryMetrics for the query
         """
-        complexity_penalty = 0
+        # One walk over the tree, grouping nodes by type; every metric below
+        # reads from this instead of re-walking the tree with find_all
+        nodes_by_type: dict = {}
+        for node in tree.walk():
+            nodes_by_type.setdefault(type(node), []).append(node)
+
+        def nodes(*classes):
+            # Same matching as find_all: the classes and their subclasses
+            return [
+                node
+                for node_type, group in nodes_by_type.items()
+                if issubclass(node_type, classes)
+                for node in group
+            ]
+
+        metrics = _QueryMetrics()
+        subquery_count = 0
+        for select in nodes(exp.Select):
+            # Nested SELECTs are subqueries, except CTE bodies (counted as CTEs)
+            if select is not tree and not isinstance(select.parent, exp.CTE):
+                subquery_count += 1
+
+            joins = select.args.get("joins") or []
+            if not select.args.get("from") and not select.args.get("from_"):
+                continue
+            sources = 1 + len(joins)
+            metrics.table_count = max(metrics.table_count, sources)
+            comma_joins = [
+                join for join in joins
+                if not (join.args.get("on") or join.args.get("using")
+                        or join.args.get("kind") or join.args.get("method")
+                        or join.args.get("side"))
+            ]
+            metrics.comma_joins += len(comma_joins)
+            if sources > 1:
+                if not select.args.get("where"):
+                    metrics.multi_table_no_where = True
+                    # NATURAL joins don't count as conditioned: with no
+                    # shared column names they are a cartesian product
+                    if any(
+                        not (join.args.get("on") or join.args.get("using")
+                             or join.args.get("kind") == "CROSS")
+                        for join in joins
+                    ):
+                        metrics.unconditioned_join = True
+                if any(e.is_star for e in select.expressions):
+                    metrics.star_over_join = True
+        metrics.subquery_count = subquery_count
+
+        metrics.cte_count = len(nodes(exp.CTE))
+        metrics.window_function_count = len(nodes(exp.Window))
+
+        table_counts = Counter(table.name.upper() for table in nodes(exp.Table))
+        metrics.self_joins = sum(1 for count in table_counts.values() if count > 1)
+
+        metrics.leading_wildcards = sum(
+            1 for like in nodes(exp.Like)
+            if isinstance(like.expression, exp.Literal)
+            and like.expression.is_string
+            and like.expression.name.startswith('%')
+        )
+        metrics.or_count = len(nodes(exp.Or))
+        metrics.has_distinct = bool(nodes(exp.Distinct))
+
+        # One point per kind of aggregate used, plus GROUP BY
+        aggregate_kinds = {
+            type(node)
+            for node in nodes(exp.Count, exp.Sum, exp.Avg, exp.Max, exp.Min)
+        }
+        metrics.aggregate_count = len(aggregate_kinds) + (1 if nodes(exp.Group) else 0)
+        return metrics
+
+    def _regex_metrics(self, query_upper: str) -> _QueryMetrics:
+        """
+        Approximate the query metrics with regexes over the upper-cased text.
 
-        # Look for FROM clause with comma-separated tables
-        from_match = re.search(r'\bFROM\s+(.*?)(?:\bWHERE\b|\bGROUP\b|\bORDER\b|\bHAVING\b|$)', query_upper, re.DOTALL)
+        Args:
+            query_upper: Upper-cased, comment-stripped SQL query
 
-        if from_match:
-            from_clause = from_match.group(1)
+        Returns:
+            _QueryMetrics for the query
+        """
+        metrics = _QueryMetrics()
+        metrics.comma_joins = self._count_comma_joins(query_upper)
+        metrics.table_count = self._count_tables(query_upper)
+        multi_table = metrics.table_count > 1
+        metrics.multi_table_no_where = multi_table and not self._has_where_clause(query_upper)
+        metrics.unconditioned_join = not _JOIN_ON_RE.search(query_upper)
+        metrics.star_over_join = multi_table and bool(_SELECT_STAR_RE.search(query_upper))
+
+        metrics.subquery_count = len(_SUBQUERY_RE.findall(query_upper))
+        metrics.cte_count = len(_CTE_RE.findall(query_upper))
+        metrics.window_function_count = len(_WINDOW_FUNCTION_RE.findall(query_upper))
 
-            # Exclude subqueries in FROM clause
-            from_clause = re.sub(r'\(.*?\)', '', from_clause)
+        # Look for table names after FROM or JOIN keywords
+        table_counts = Counter(_TABLE_REF_RE.findall(query_upper))
+        metrics.self_joins = sum(1 for count in table_counts.values() if count > 1)
 
-            # Count commas (indicates multiple tables)
-            comma_count = from_clause.count(',')
+        metrics.leading_wildcards = len(_LEADING_WILDCARD_RE.findall(query_upper))
+        metrics.or_count = len(_OR_RE.findall(query_upper))
+        metrics.has_distinct = 'DISTINCT' in query_upper
 
-            if comma_count > 0:
-                # This is comma-separated table syntax (old-style join)
-                complexity_penalty = comma_count * 20  # Heavy penalty
-                warnings.append(
-                    f"Detected {comma_count + 1} comma-separated tables in FROM clause. "
-                    "This can create cartesian products. Use explicit JOIN syntax."
-                )
+        # One point per kind of aggregate used, plus GROUP BY
+        metrics.aggregate_count = len(set(_AGGREGATE_RE.findall(query_upper)))
+        return metrics
 
-        return complexity_penalty
+    def _top_level_from_clause(self, query_upper: str) -> Optional[str]:
+        """
+        Extract the first FROM clause with parenthesized content removed.
+
+        Scans forward from FROM, tracking parenthesis depth, and stops at
+        the first top-level WHERE, GROUP, ORDER or HAVING (or end of query).
+        Runs in linear time regardless of input.
+
+        Args:
+            query_upper: Upper-cased, comment-stripped SQL query
+
+        Returns:
+            FROM clause text without subqueries, or None if there is no FROM
+        """
+        from_match = _FROM_RE.search(query_upper)
+        if not from_match:
+            return None
+
+        pieces = []
+        depth = 0
+        segment_start = from_match.end()
+        for token in _CLAUSE_TOKEN_RE.finditer(query_upper, from_match.end()):
+            text = token.group()
+            if text == '(':
+                if depth == 0:
+                    pieces.append(query_upper[segment_start:token.start()])
+                depth += 1
+            elif text == ')':
+                if depth > 0:
+                    depth -= 1
+                    if depth == 0:
+                        segment_start = token.end()
+            elif depth == 0 and text in _FROM_TERMINATORS:
+                pieces.append(query_upper[segment_start:token.start()])
+                return ''.join(pieces)
+
+        if depth == 0:
+            pieces.append(query_upper[segment_start:])
+        return ''.join(pieces)
+
+    def _count_comma_joins(self, query_upper: str) -> int:
+        """
+        Count comma-separated tables in the FROM clause (old-style joins).
+
+        Returns:
+            Number of commas between FROM-clause tables
+        """
+        from_clause = self._top_level_from_clause(query_upper)
+
+        if from_clause is None:
+            return 0
+
+        # Count commas (indicates multiple tables)
+        return from_clause.count(',')
 
     def _count_tables(self, query_upper: str) -> int:
         """
@@ -297,50 +607,42 @@ class QueryValidator:
         Returns:
             Number of tables
         """
-        # Look for FROM clause
-        from_match = re.search(r'\bFROM\s+(.*?)(?:\bWHERE\b|\bGROUP\b|\bORDER\b|\bHAVING\b|$)', query_upper, re.DOTALL)
+        from_clause = self._top_level_from_clause(query_upper)
 
-        if not from_match:
+        if from_clause is None:
             return 1  # Assume at least one table
 
-        from_clause = from_match.group(1)
-
-        # Remove subqueries
-        from_clause = re.sub(r'\(.*?\)', '', from_clause)
-
         # Count table references (commas + JOINs)
         comma_count = from_clause.count(',')
-        join_count = len(re.findall(r'\bJOIN\b', from_clause))
+        join_count = len(_JOIN_RE.findall(from_clause))
 
         # Total tables = 1 (first table) + commas + joins
         return 1 + comma_count + join_count
 
     def _has_where_clause(self, query_upper: str) -> bool:
         """Check if query has a WHERE clause."""
-        return bool(re.search(r'\bWHERE\b', query_upper))
+        return bool(_WHERE_RE.search(query_upper))
 
-    def _has_rownum_constraint(self, query: str) -> bool:
+    def _has_rownum_constraint(self, query_upper: str) -> bool:
         """
         Check if query already has a ROWNUM constraint.
 
         Args:
-            query: SQL query to check
+            query_upper: Upper-cased SQL query to check
 
         Returns:
             True if query has ROWNUM constraint, False otherwise
         """
-        query_upper = query.upper()
-
         # Look for ROWNUM in WHERE clause or comparison
         # Match patterns like:
         # - WHERE ROWNUM <= 100
         # - AND ROWNUM < 1000
         # - ROWNUM = 1
-        if re.search(r'\bROWNUM\s*[<>=]+\s*\d+', query_upper):
+        if _ROWNUM_COMPARE_RE.search(query_upper):
             return True
 
         # Check for ROWNUM in subquery wrapping pattern
-        if re.search(r'WHERE\s+ROWNUM\s*<=', query_upper):
+        if _WHERE_ROWNUM_RE.search(query_upper):
             return True
 
         return False
@@ -355,30 +657,92 @@ class QueryValidator:
         Returns:
             Query wrapped with ROWNUM limit
         """
+        return self.apply_row_limit(query)[0]
+
+    def apply_row_limit(self, query: str) -> Tuple[str, bool]:
+        """
+        Wrap query with ROWNUM limit and report whether a limit was added.
+
+        Callers that need to know if the limit applies should use this
+        instead of comparing the text against the original query: a query
+        that already has a ROWNUM constraint still comes back stripped.
+
+        Args:
+            query: Original SQL query
+
+        Returns:
+            Tuple of (query to execute, True if a ROWNUM limit was added)
+        """
         query_stripped = query.strip()
         query_upper = query_stripped.upper()
 
         # If query already has proper ROWNUM constraint, don't wrap
-        if self._has_rownum_constraint(query_stripped):
-            return query_stripped
-
-        # If query has ORDER BY, we need to preserve it
-        if 'ORDER BY' in query_upper:
-            # Wrap the entire query and apply ROWNUM in outer query
-            return f"""
+        if self._has_rownum_constraint(query_upper):
+            return query_stripped, False
+
+        # The limit is a literal rather than a bind: max_rows is fixed for
+        # the validator's lifetime, so the wrapped text (and Oracle's cached
+        # cursor for it) is the same on every call. A bind would also hide
+        # the limit from the preview and from _has_rownum_constraint, and
+        # would mean guessing at placeholders inside user-written SQL.
+        placement = self._row_limit_placement(query_stripped, query_upper)
+        if placement == 'where':
+            # Add WHERE ROWNUM condition
+            return f"{query_stripped} WHERE ROWNUM <= {self.max_rows}", True
+        if placement == 'and':
+            # Add AND ROWNUM condition
+            return f"{query_stripped} AND ROWNUM <= {self.max_rows}", True
+
+        # Wrap the entire query and apply ROWNUM in outer query; the line
+        # breaks keep a trailing -- comment from swallowing the limit
+        return f"""
 SELECT * FROM (
     {query_stripped}
 ) WHERE ROWNUM <= {self.max_rows}
-""".strip()
-        else:
-            # Simple case: just add WHERE ROWNUM
-            # Check if query already has WHERE
-            if 'WHERE' in query_upper:
-                # Add AND ROWNUM condition
-                return f"{query_stripped} AND ROWNUM <= {self.max_rows}"
-            else:
-                # Add WHERE ROWNUM condition
-                return f"{query_stripped} WHERE ROWNUM <= {self.max_rows}"
+""".strip(), True
+
+    def _row_limit_placement(self, query: str, query_upper: str) -> str:
+        """
+        Decide where a ROWNUM limit can go without changing the query's meaning.
+
+        Appending to the end is only safe when the outermost WHERE would be
+        the last clause: no GROUP BY, HAVING, ORDER BY, DISTINCT, CONNECT BY
+        and so on, and no top-level OR the appended AND would bind into.
+        The select list must not have aggregates or window functions
+        either: Oracle applies ROWNUM before computing them, so an inline
+        limit would change their result rather than cap the rows returned.
+        Everything else is wrapped in an outer SELECT.
+
+        Args:
+            query: Stripped SQL query
+            query_upper: Upper-cased form of the same query
+
+        Returns:
+            'where' to append WHERE ROWNUM, 'and' to append AND ROWNUM,
+            or 'wrap' to wrap the query in an outer SELECT
+        """
+        # A trailing -- comment would swallow anything appended on the same line
+        if '--' in query_upper or '/*' in query_upper:
+            return 'wrap'
+
+        tree = _parse_select(query)
+        if tree is not None:
+            clauses = {key for key, value in tree.args.items() if value}
+            if not clauses <= _INLINE_LIMIT_CLAUSES:
+                return 'wrap'
+            if any(e.find(exp.AggFunc, exp.Window) for e in tree.expressions):
+                return 'wrap'
+            where = tree.args.get("where")
+            if where is None:
+                return 'where'
+            return 'wrap' if isinstance(where.this, exp.Or) else 'and'
+
+        # Text heuristics when the query can't be parsed
+        if 'ORDER BY' in query_upper:
+            return 'wrap'
+        if _AGGREGATE_RE.search(query_upper) or _WINDOW_RE.search(query_upper):
+            return 'wrap'
+        return 'and' if 'WHERE' in query_upper else 'where'
 
 
 def main():
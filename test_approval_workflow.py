@@ -5,113 +5,21 @@ Tests approval workflow: token generation, verification, expiry, one-time use.
 """
 
 import asyncio
-import time
-import hashlib
-import secrets
-
-
-class QueryApprovalTracker:
-    """
-    Tracks query approvals to enforce the approval workflow.
-    Ensures queries are previewed and explicitly approved before execution.
-    """
-
-    def __init__(self, token_expiry: int = 300):
-        """
-        Initialize query approval tracker.
-
-        Args:
-            token_expiry: Token expiry time in seconds (default: 5 minutes)
-        """
-        self.token_expiry = token_expiry
-        self.approvals = {}  # {token: {query_hash, timestamp, query_preview}}
-        self.lock = asyncio.Lock()
-
-    def _hash_query(self, query: str) -> str:
-        """
-        Generate hash of query for approval tracking.
-
-        Args:
-            query: SQL query
-
-        Returns:
-            SHA256 hash of normalized query
-        """
-        # Normalize query (strip whitespace, lowercase) for consistent hashing
-        normalized = ' '.join(query.strip().lower().split())
-        return hashlib.sha256(normalized.encode()).hexdigest()
-
-    async def generate_approval_token(self, query: str) -> str:
-        """
-        Generate approval token for a query.
-
-        Args:
-            query: SQL query that needs approval
-
-        Returns:
-            Approval token (32-character hex string)
-        """
-        async with self.lock:
-            # Generate secure random token
-            token = secrets.token_hex(16)  # 32 character hex string
-
-            # Store approval with metadata
-            self.approvals[token] = {
-                'query_hash': self._hash_query(query),
-                'timestamp': time.time(),
-                'query_preview': query[:100]  # Store preview for logging
-            }
-
-            # Cleanup expired tokens
-            self._cleanup_expired()
-
-            return token
-
-    def _cleanup_expired(self):
-        """Remove expired tokens from storage."""
-        current_time = time.time()
-        expired_tokens = [
-            token for token, data in self.approvals.items()
-            if current_time - data['timestamp'] > self.token_expiry
-        ]
-        for token in expired_tokens:
-            del self.approvals[token]
-
-    async def verify_approval(self, query: str, token: str) -> tuple[bool, str]:
-        """
-        Verify that query has been approved with valid token.
-
-        Args:
-            query: SQL query to execute
-            token: Approval token from preview_query
-
-        Returns:
-            Tuple of (is_approved, error_message)
-        """
-        async with self.lock:
-            # Cleanup expired tokens first
-            self._cleanup_expired()
-
-            # Check if token provided
-            if not token:
-                return False, "No approval token provided. You must call preview_query first to get an approval token, then include that token when calling query_oracle."
-
-            # Check if token exists
-            if token not in self.approvals:
-                return False, "Invalid or expired approval token. The token may have expired (5 minute limit) or been used already (one-time use). Call preview_query again to get a new token."
-
-            # Get approval data
-            approval_data = self.approvals[token]
-
-            # Verify query matches
-            query_hash = self._hash_query(query)
-            if query_hash != approval_data['query_hash']:
-                return False, "Query does not match approved query. The query you're trying to execute is different from the one you previewed. Make sure you're using the exact same query."
-
-            # Token is valid - consume it (one-time use)
-            del self.approvals[token]
-
-            return True, ""
+
+from guardrails import QueryApprovalTracker
+
+
+class FakeClock:
+    """Clock the tests advance by hand instead of sleeping."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
 
 
 async def test_token_generation():
@@ -127,8 +35,8 @@ async def test_token_generation():
 
     print(f"Generated token: {token[:16]}... (length: {len(token)})")
     assert token is not None, "Token should be generated"
-    assert len(token) == 32, f"Token should be 32 characters, got {len(token)}"
-    assert token.isalnum(), "Token should be alphanumeric"
+    assert len(token) == 22, f"Token should be 22 characters, got {len(token)}"
+    assert all(c.isalnum() or c in "-_" for c in token), "Token should be URL-safe base64"
     print("✅ PASS: Token generated with correct format")
 
 
@@ -236,7 +144,8 @@ async def test_token_expiry():
     print("Test: Token Expiry")
 
     # Use very short expiry for testing
-    tracker = QueryApprovalTracker(token_expiry=1)
+    clock = FakeClock()
+    tracker = QueryApprovalTracker(token_expiry=1, clock=clock)
     query = "SELECT * FROM users WHERE id = 123"
 
     # Generate token
@@ -244,8 +153,8 @@ async def test_token_expiry():
     print(f"Token generated with 1 second expiry")
 
     # Wait for expiry
-    print("Waiting 1.5 seconds for token to expire...")
-    await asyncio.sleep(1.5)
+    print("Advancing 1.5 seconds for token to expire...")
+    clock.advance(1.5)
 
     # Try to use expired token
     is_valid, error = await tracker.verify_approval(query, token)
@@ -255,6 +164,35 @@ async def test_token_expiry():
     print("✅ PASS: Token expires after timeout")
 
 
+async def test_expiry_in_issue_order():
+    """Test that cleanup drops expired tokens and keeps newer ones."""
+    print(f"\n{'='*60}")
+    print("Test: Expiry In Issue Order")
+
+    clock = FakeClock()
+    tracker = QueryApprovalTracker(token_expiry=1, clock=clock)
+    old_query = "SELECT * FROM users WHERE id = 1"
+    new_query = "SELECT * FROM users WHERE id = 2"
+
+    old_token = await tracker.generate_approval_token(old_query)
+    clock.advance(0.6)
+    new_token = await tracker.generate_approval_token(new_query)
+
+    # Only the first token is past its expiry now
+    clock.advance(0.6)
+    pending = tracker.get_pending_approvals()
+    print(f"Pending after first expiry: {pending}")
+    assert pending == 1, f"Expected 1 live token, got {pending}"
+
+    is_valid, error = await tracker.verify_approval(old_query, old_token)
+    assert not is_valid, "Expired token should be rejected"
+    assert "Invalid or expired" in error, "Should have appropriate error message"
+
+    is_valid, error = await tracker.verify_approval(new_query, new_token)
+    assert is_valid, f"Newer token should still be valid: {error}"
+    print("✅ PASS: Expired tokens removed without touching newer ones")
+
+
 async def test_missing_token():
     """Test that missing token is rejected."""
     print(f"\n{'='*60}")
@@ -283,32 +221,56 @@ async def test_multiple_tokens():
     print("Test: Multiple Concurrent Tokens")
 
     tracker = QueryApprovalTracker(token_expiry=300)
-    query1 = "SELECT * FROM users WHERE id = 123"
-    query2 = "SELECT * FROM orders WHERE id = 456"
-    query3 = "SELECT * FROM products WHERE id = 789"
+    queries = [
+        "SELECT * FROM users WHERE id = 123",
+        "SELECT * FROM orders WHERE id = 456",
+        "SELECT * FROM products WHERE id = 789",
+    ]
 
-    # Generate multiple tokens
-    token1 = await tracker.generate_approval_token(query1)
-    token2 = await tracker.generate_approval_token(query2)
-    token3 = await tracker.generate_approval_token(query3)
+    # Generate multiple tokens concurrently
+    tokens = await asyncio.gather(*(tracker.generate_approval_token(q) for q in queries))
 
-    print(f"Generated 3 tokens for different queries")
+    print(f"Generated {len(tokens)} tokens for different queries")
+    assert len(set(tokens)) == len(queries), "Each query should get its own token"
 
-    # Verify all tokens work
-    is_valid1, _ = await tracker.verify_approval(query1, token1)
-    is_valid2, _ = await tracker.verify_approval(query2, token2)
-    is_valid3, _ = await tracker.verify_approval(query3, token3)
+    # Verify all tokens concurrently
+    results = await asyncio.gather(*(tracker.verify_approval(q, t) for q, t in zip(queries, tokens)))
 
-    print(f"Token 1 valid: {is_valid1}")
-    print(f"Token 2 valid: {is_valid2}")
-    print(f"Token 3 valid: {is_valid3}")
+    for i, (is_valid, error) in enumerate(results, 1):
+        print(f"Token {i} valid: {is_valid}")
+        assert is_valid, f"Token {i} should be valid: {error}"
 
-    assert is_valid1, "Token 1 should be valid"
-    assert is_valid2, "Token 2 should be valid"
-    assert is_valid3, "Token 3 should be valid"
+    assert tracker.get_pending_approvals() == 0, "All tokens should be consumed"
     print("✅ PASS: Multiple tokens can coexist")
 
 
+async def test_validation_stored_with_approval():
+    """Test that preview validation is handed back only for the exact query."""
+    print(f"\n{'='*60}")
+    print("Test: Validation Stored With Approval")
+
+    tracker = QueryApprovalTracker(token_expiry=300)
+    query = "SELECT * FROM users WHERE name = 'Bob'"
+    validated = ("validation-result", query)
+
+    # Exact query text - stored validation is returned
+    token = await tracker.generate_approval_token(query, validated)
+    is_valid, error, claimed = await tracker.claim_approval(query, token)
+    print(f"Exact query - Valid: {is_valid}, Validation returned: {claimed is not None}")
+    assert is_valid, f"Token should be valid: {error}"
+    assert claimed == validated, "Stored validation should be returned"
+
+    # Same hash, different literal case - approved but must be revalidated
+    token = await tracker.generate_approval_token(query, validated)
+    is_valid, error, claimed = await tracker.claim_approval(query.upper(), token)
+    print(f"Different case - Valid: {is_valid}, Validation returned: {claimed is not None}")
+    assert is_valid, f"Normalized query should still be approved: {error}"
+    assert claimed is None, "Validation must not be reused for different query text"
+
+    assert not tracker.approvals, "Consumed approvals should leave nothing behind"
+    print("✅ PASS: Validation reused only for the exact previewed query")
+
+
 async def main():
     """Run all approval workflow tests."""
     print("🧪 Testing QueryApprovalTracker")
@@ -321,8 +283,10 @@ async def main():
         ("Token Query Matching", test_token_query_matching),
         ("Whitespace Normalization", test_token_whitespace_normalization),
         ("Token Expiry", test_token_expiry),
+        ("Expiry In Issue Order", test_expiry_in_issue_order),
         ("Missing Token", test_missing_token),
         ("Multiple Concurrent Tokens", test_multiple_tokens),
+        ("Validation Stored With Approval", test_validation_stored_with_approval),
     ]
 
     passed = 0
@@ -5,102 +5,21 @@ Tests circuit breaker states: CLOSED, OPEN, HALF_OPEN transitions.
 """
 
 import asyncio
-import time
-
-
-class CircuitBreaker:
-    """
-    Circuit breaker pattern to prevent hammering a failing database.
-    States: CLOSED (normal), OPEN (failing), HALF_OPEN (testing recovery)
-    """
-
-    def __init__(self, failure_threshold: int = 5, recovery_timeout: int = 60, success_threshold: int = 2):
-        """
-        Initialize circuit breaker.
-
-        Args:
-            failure_threshold: Number of consecutive failures to open circuit
-            recovery_timeout: Seconds to wait before attempting recovery
-            success_threshold: Number of consecutive successes to close circuit
-        """
-        self.failure_threshold = failure_threshold
-        self.recovery_timeout = recovery_timeout
-        self.success_threshold = success_threshold
-
-        # Circuit state
-        self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
-        self.failure_count = 0
-        self.success_count = 0
-        self.last_failure_time = None
-        self.lock = asyncio.Lock()
-
-    async def call(self, func, *args, **kwargs):
-        """
-        Execute function through circuit breaker.
-
-        Args:
-            func: Function to execute
-            *args: Function arguments
-            **kwargs: Function keyword arguments
-
-        Returns:
-            Function result
-
-        Raises:
-            RuntimeError: If circuit is open
-        """
-        async with self.lock:
-            # Check circuit state
-            if self.state == "OPEN":
-                # Check if recovery timeout has elapsed
-                if time.time() - self.last_failure_time >= self.recovery_timeout:
-                    self.state = "HALF_OPEN"
-                    self.success_count = 0
-                else:
-                    # Circuit is open, reject request
-                    remaining = int(self.recovery_timeout - (time.time() - self.last_failure_time))
-                    raise RuntimeError(f"Circuit breaker is OPEN. Database appears to be down. Retry in {remaining} seconds.")
-
-        # Execute function
-        try:
-            result = func(*args, **kwargs) if not asyncio.iscoroutinefunction(func) else await func(*args, **kwargs)
 
-            # Success - update circuit state
-            async with self.lock:
-                self.failure_count = 0
+from guardrails import CircuitBreaker
 
-                if self.state == "HALF_OPEN":
-                    self.success_count += 1
-                    if self.success_count >= self.success_threshold:
-                        self.state = "CLOSED"
-                        self.success_count = 0
 
-            return result
+class FakeClock:
+    """Clock the tests advance by hand instead of sleeping."""
 
-        except Exception as e:
-            # Failure - update circuit state
-            async with self.lock:
-                self.failure_count += 1
-                self.last_failure_time = time.time()
-                self.success_count = 0
-
-                if self.state == "HALF_OPEN":
-                    # Recovery attempt failed
-                    self.state = "OPEN"
-                elif self.failure_count >= self.failure_threshold:
-                    # Threshold exceeded
-                    self.state = "OPEN"
-
-            raise
-
-    def get_state(self) -> dict:
-        """Get current circuit breaker state."""
-        return {
-            'state': self.state,
-            'failure_count': self.failure_count,
-            'success_count': self.success_count,
-            'last_failure_time': self.last_failure_time
-        }
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
 
 
 async def test_circuit_starts_closed():
@@ -129,7 +48,7 @@ async def test_successful_calls():
 
     # Make multiple successful calls
     for i in range(5):
-        result = await breaker.call(success_func)
+        result = await breaker.call_sync(success_func)
         assert result == "success", f"Call {i+1} should succeed"
 
     state = breaker.get_state()
@@ -141,6 +60,32 @@ async def test_successful_calls():
     print("✅ PASS: Successful calls keep circuit CLOSED")
 
 
+async def test_calls_run_concurrently():
+    """Test that the breaker doesn't serialize calls while CLOSED."""
+    print(f"\n{'='*60}")
+    print("Test: Calls Run Concurrently")
+
+    breaker = CircuitBreaker(failure_threshold=3)
+    running = 0
+    peak = 0
+
+    async def slow_func():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return "success"
+
+    results = await asyncio.gather(*(breaker.call_async(slow_func) for _ in range(5)))
+    print(f"Peak concurrent calls: {peak}")
+
+    assert results == ["success"] * 5, "All calls should succeed"
+    assert peak == 5, f"All 5 calls should overlap, peak was {peak}"
+    assert breaker.get_state()['state'] == "CLOSED", "Circuit should remain CLOSED"
+    print("✅ PASS: Calls through a CLOSED circuit run concurrently")
+
+
 async def test_circuit_opens_after_failures():
     """Test that circuit opens after threshold failures."""
     print(f"\n{'='*60}")
@@ -154,7 +99,7 @@ async def test_circuit_opens_after_failures():
     # Cause failures to open circuit
     for i in range(3):
         try:
-            await breaker.call(failing_func)
+            await breaker.call_sync(failing_func)
         except Exception:
             print(f"Failure {i+1}/3")
             pass
@@ -181,7 +126,7 @@ async def test_circuit_rejects_when_open():
     # Open the circuit
     for i in range(2):
         try:
-            await breaker.call(failing_func)
+            await breaker.call_sync(failing_func)
         except Exception:
             pass
 
@@ -189,7 +134,7 @@ async def test_circuit_rejects_when_open():
 
     # Try to make a call - should be rejected immediately
     try:
-        await breaker.call(failing_func)
+        await breaker.call_sync(failing_func)
         assert False, "Should have raised RuntimeError"
     except RuntimeError as e:
         print(f"Rejected: {str(e)[:50]}...")
@@ -203,7 +148,8 @@ async def test_circuit_enters_half_open():
     print(f"\n{'='*60}")
     print("Test: Circuit Enters HALF_OPEN After Timeout")
 
-    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=1, success_threshold=2)
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=1, success_threshold=2, clock=clock)
 
     def failing_func():
         raise Exception("Database error")
@@ -211,22 +157,22 @@ async def test_circuit_enters_half_open():
     # Open the circuit
     for i in range(2):
         try:
-            await breaker.call(failing_func)
+            await breaker.call_sync(failing_func)
         except Exception:
             pass
 
     assert breaker.get_state()['state'] == "OPEN", "Circuit should be OPEN"
-    print("Circuit OPEN, waiting 1.5 seconds for recovery timeout...")
+    print("Circuit OPEN, advancing 1.5 seconds past recovery timeout...")
 
     # Wait for recovery timeout
-    await asyncio.sleep(1.5)
+    clock.advance(1.5)
 
     # Try a call - should enter HALF_OPEN (but still fail)
     def still_failing():
         raise Exception("Still failing")
 
     try:
-        await breaker.call(still_failing)
+        await breaker.call_sync(still_failing)
     except Exception:
         pass
 
@@ -241,7 +187,8 @@ async def test_circuit_closes_after_recovery():
     print(f"\n{'='*60}")
     print("Test: Circuit Closes After Successful Recovery")
 
-    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=1, success_threshold=2)
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=1, success_threshold=2, clock=clock)
 
     call_count = [0]
 
@@ -254,7 +201,7 @@ async def test_circuit_closes_after_recovery():
     # Open the circuit (2 failures)
     for i in range(2):
         try:
-            await breaker.call(func_that_recovers)
+            await breaker.call_sync(func_that_recovers)
         except Exception:
             pass
 
@@ -262,13 +209,13 @@ async def test_circuit_closes_after_recovery():
     print("Circuit OPEN, waiting for recovery timeout...")
 
     # Wait for recovery timeout
-    await asyncio.sleep(1.5)
+    clock.advance(1.5)
 
     # Make successful calls to close circuit
     print("Making successful recovery attempts...")
     for i in range(3):
         try:
-            result = await breaker.call(func_that_recovers)
+            result = await breaker.call_sync(func_that_recovers)
             print(f"Recovery attempt {i+1}: {result}")
         except Exception as e:
             print(f"Recovery attempt {i+1}: failed - {e}")
@@ -297,7 +244,7 @@ async def test_failure_count_resets_on_success():
     # Make 2 failures
     for i in range(2):
         try:
-            await breaker.call(alternating_func, True)
+            await breaker.call_sync(alternating_func, True)
         except Exception:
             pass
 
@@ -306,7 +253,7 @@ async def test_failure_count_resets_on_success():
     assert state1['failure_count'] == 2, "Should have 2 failures"
 
     # Make a successful call
-    result = await breaker.call(alternating_func, False)
+    result = await breaker.call_sync(alternating_func, False)
     assert result == "success"
 
     state2 = breaker.get_state()
@@ -347,6 +294,7 @@ async def main():
     tests = [
         ("Circuit Starts CLOSED", test_circuit_starts_closed),
         ("Successful Calls", test_successful_calls),
+        ("Calls Run Concurrently", test_calls_run_concurrently),
         ("Circuit Opens After Failures", test_circuit_opens_after_failures),
         ("Circuit Rejects When OPEN", test_circuit_rejects_when_open),
         ("Circuit Enters HALF_OPEN", test_circuit_enters_half_open),
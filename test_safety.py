@@ -7,16 +7,18 @@ Tests dangerous queries to ensure they are blocked.
 from query_validator import QueryValidator
 import json
 
+# Shared by the safety and preview tests, which check several of the same
+# queries; the validator's result cache validates each text only once
+validator = QueryValidator(
+    max_complexity=50,
+    max_rows=10000,
+    allow_cross_joins=False
+)
+
 
 def test_dangerous_queries():
     """Test that dangerous queries are properly blocked."""
 
-    validator = QueryValidator(
-        max_complexity=50,
-        max_rows=10000,
-        allow_cross_joins=False
-    )
-
     # Test cases: (query, should_be_blocked, reason)
     test_cases = [
         # SHOULD BE BLOCKED
@@ -114,12 +116,6 @@ def test_preview_query():
     print("PREVIEW_QUERY FUNCTIONALITY TESTS")
     print("=" * 80)
 
-    validator = QueryValidator(
-        max_complexity=50,
-        max_rows=10000,
-        allow_cross_joins=False
-    )
-
     # Test cases: (query, expected_safe, expected_complexity_range, description)
     test_cases = [
         # Safe queries
@@ -143,8 +139,7 @@ def test_preview_query():
 
         # Simulate preview_query logic
         validation = validator.validate(query)
-        safe_query = validator.wrap_with_row_limit(query)
-        row_limit_applied = safe_query != query
+        safe_query, row_limit_applied = validator.apply_row_limit(query)
 
         # Build preview response (mimics oracle_mcp_server.py preview_query)
         preview_response = {